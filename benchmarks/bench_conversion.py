@@ -0,0 +1,211 @@
+"""
+Benchmark suite of the conversions between ommx.v1.Instance and amplify.Model.
+
+For each generated instance, times `OMMXFixstarsAmplifyAdapter(...)`, `decode_to_state`
+and `model_to_instance`, and reports their throughput and the peak Python heap memory
+traced by `tracemalloc` (allocations made inside amplify and ommx are not included).
+Runs offline: `decode_to_state` gets its result from a local stand-in client, and is
+skipped with amplify versions that do not support custom clients.
+
+Run from the repository root. Save a baseline, then compare another revision to it::
+
+    python benchmarks/bench_conversion.py --save baseline.json
+    python benchmarks/bench_conversion.py --compare baseline.json
+
+With `--compare`, the exit status is 1 if any timing is slower than the baseline by
+more than `--tolerance`.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import typing
+import warnings
+from datetime import timedelta
+from importlib import metadata
+
+import amplify
+from ommx.v1 import Instance
+
+from ommx_fixstars_amplify_adapter import OMMXFixstarsAmplifyAdapter
+from ommx_fixstars_amplify_adapter.amplify_to_ommx import OMMXInstanceBuilder
+from ommx_fixstars_amplify_adapter.annealing import _CustomClientResult
+
+from generators import GENERATORS, SIZES
+
+
+class _StandInClient:
+    """
+    Local client returning the lower bound of every variable as the only solution.
+    """
+
+    parameters = None
+    version = "local"
+
+    def __init__(self, model: amplify.Model):
+        self._values = [
+            0.0 if var.lower_bound is None else float(var.lower_bound)
+            for var in model.variables
+        ]
+
+    @property
+    def acceptable_degrees(self) -> amplify.AcceptableDegrees:
+        degrees = {"Binary": "HighOrder", "Integer": "HighOrder", "Real": "HighOrder"}
+        return amplify.AcceptableDegrees(
+            objective=degrees,  # type: ignore
+            equality_constraints=degrees,  # type: ignore
+            inequality_constraints=degrees,  # type: ignore
+        )
+
+    def solve(self, objective, constraints, dry_run: bool = False):
+        if dry_run:
+            return None
+        return _CustomClientResult([self._values], timedelta(0))
+
+
+def measure(
+    function: typing.Callable[[], typing.Any], repeat: int
+) -> typing.Tuple[float, int]:
+    """
+    The best wall time of `repeat` calls of `function`, and the peak traced memory
+    of one more call.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+def run_case(instance: Instance, repeat: int) -> typing.Dict[str, typing.Any]:
+    adapter = OMMXFixstarsAmplifyAdapter(instance)
+    # The model is built on first access, and the stats along with it.
+    adapter.solver_input
+    stats = adapter.stats
+    case: typing.Dict[str, typing.Any] = {
+        "num_variables": stats.num_variables,
+        "num_constraints": stats.num_constraints,
+        "num_terms": stats.num_terms,
+    }
+    results = {}
+    results["adapter"] = measure(
+        lambda: OMMXFixstarsAmplifyAdapter(instance).solver_input, repeat
+    )
+    if hasattr(amplify, "CustomClientProtocol"):
+        result = amplify.solve(adapter.model, _StandInClient(adapter.model))
+        # The stand-in solution need not be feasible.
+        result.filter_solution = False
+        results["decode_to_state"] = measure(
+            lambda: adapter.decode_to_state(result), repeat
+        )
+    builder = OMMXInstanceBuilder(adapter.model)
+    results["model_to_instance"] = measure(builder.build, repeat)
+
+    case["seconds"] = {stage: seconds for stage, (seconds, _) in results.items()}
+    case["peak_memory"] = {stage: peak for stage, (_, peak) in results.items()}
+    return case
+
+
+def report(name: str, case: typing.Dict[str, typing.Any]):
+    print(
+        f"{name}: {case['num_variables']} variables, "
+        f"{case['num_constraints']} constraints, {case['num_terms']} terms"
+    )
+    for stage, seconds in case["seconds"].items():
+        # decode_to_state handles one value per variable, the other stages each term.
+        size = case["num_variables" if stage == "decode_to_state" else "num_terms"]
+        print(
+            f"  {stage:<18} {seconds * 1e3:10.2f} ms  {size / seconds:14,.0f} /s  "
+            f"peak {case['peak_memory'][stage] / 2**20:8.2f} MiB"
+        )
+
+
+def compare(
+    cases: typing.Dict[str, typing.Any],
+    baseline: typing.Dict[str, typing.Any],
+    tolerance: float,
+) -> bool:
+    """
+    Print the ratio of each timing to the baseline, and whether any regressed.
+    """
+    regressed = False
+    print(f"compared to the baseline (tolerance {tolerance:.0%}):")
+    for name, case in cases.items():
+        if name not in baseline["cases"]:
+            continue
+        for stage, seconds in case["seconds"].items():
+            base = baseline["cases"][name]["seconds"].get(stage)
+            if base is None:
+                continue
+            ratio = seconds / base
+            flag = ""
+            if ratio > 1.0 + tolerance:
+                flag = "  REGRESSION"
+                regressed = True
+            print(f"  {name:<24} {stage:<18} {ratio:6.2f}x{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--problems", nargs="+", choices=list(GENERATORS), default=list(GENERATORS)
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        choices=["small", "medium", "large"],
+        default=["small", "medium"],
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", help="Compare to a JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+    # Amplify warns about every higher-order constraint on integer variables.
+    warnings.filterwarnings("ignore", message="estimating min and max value")
+
+    cases = {}
+    for problem in args.problems:
+        for size in args.sizes:
+            name = f"{problem}/{size}"
+            instance = GENERATORS[problem](**SIZES[problem][size], seed=args.seed)
+            cases[name] = run_case(instance, args.repeat)
+            report(name, cases[name])
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "amplify": metadata.version("amplify"),
+                    "ommx": metadata.version("ommx"),
+                    "numpy": metadata.version("numpy"),
+                    "cases": cases,
+                },
+                f,
+                indent=2,
+            )
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(cases, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
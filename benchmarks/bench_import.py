@@ -0,0 +1,59 @@
+"""
+Benchmark of the import time of the package, in fresh interpreters.
+
+Run from the repository root::
+
+    python benchmarks/bench_import.py --repeat 10
+
+Add `-X importtime` to one of the statements to see which modules dominate, e.g.::
+
+    python -X importtime -c "import ommx_fixstars_amplify_adapter"
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = [
+    "import ommx_fixstars_amplify_adapter",
+    "from ommx_fixstars_amplify_adapter import ModelCache",
+    "from ommx_fixstars_amplify_adapter import model_to_instance",
+    "from ommx_fixstars_amplify_adapter import OMMXFixstarsAmplifyAdapter",
+]
+
+_TIMER = """
+import time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+"""
+
+
+def import_time(statement: str) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", _TIMER.format(statement=statement)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for statement in STATEMENTS:
+        timings = [import_time(statement) for _ in range(args.repeat)]
+        print(
+            f"{statement:<70} median {statistics.median(timings) * 1e3:8.1f} ms, "
+            f"best {min(timings) * 1e3:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
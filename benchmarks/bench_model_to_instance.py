@@ -0,0 +1,78 @@
+"""
+Benchmark of `model_to_instance` on constraint-heavy Amplify models.
+
+Run from the repository root, e.g. on two revisions to compare them::
+
+    python benchmarks/bench_model_to_instance.py --constraints 20000 --terms 30
+"""
+
+import argparse
+import time
+
+import amplify
+import numpy as np
+
+from ommx_fixstars_amplify_adapter.amplify_to_ommx import OMMXInstanceBuilder
+
+
+def constraint_heavy_model(
+    num_variables: int, num_constraints: int, num_terms: int, seed: int = 0
+) -> amplify.Model:
+    """
+    A binary model with a linear objective and `num_constraints` random quadratic
+    constraints, cycling through LE, EQ, GE and clamp constraints.
+    """
+    rng = np.random.default_rng(seed)
+    gen = amplify.VariableGenerator()
+    x = gen.array("Binary", num_variables)
+
+    model = amplify.Model()
+    objective = amplify.einsum("i,i->", rng.random(num_variables), x)
+    assert isinstance(objective, amplify.Poly)
+    model += objective
+    half = num_terms // 2
+    for k in range(num_constraints):
+        ids = rng.choice(num_variables, 2 * half, replace=False).tolist()
+        poly = amplify.einsum(
+            "i,i->", rng.random(half), x.take(ids[:half])
+        ) + amplify.einsum(
+            "i,i,i->", rng.random(half), x.take(ids[:half]), x.take(ids[half:])
+        )
+        if k % 4 == 0:
+            model += amplify.less_equal(poly, 1.0)
+        elif k % 4 == 1:
+            model += amplify.equal_to(poly, 1.0)
+        elif k % 4 == 2:
+            model += amplify.greater_equal(poly, 1.0)
+        else:
+            model += amplify.clamp(poly, (0.5, 1.5))
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--variables", type=int, default=2000)
+    parser.add_argument("--constraints", type=int, default=20000)
+    parser.add_argument("--terms", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    model = constraint_heavy_model(args.variables, args.constraints, args.terms)
+    builder = OMMXInstanceBuilder(model)
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        builder.constraints()
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    print(
+        f"constraints={args.constraints} terms/constraint={args.terms}: "
+        f"best {best:.3f} s, median {float(np.median(timings)):.3f} s, "
+        f"{args.constraints * args.terms / best:,.0f} terms/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Synthetic ommx.v1.Instance generators for the conversion benchmarks.
+
+All generators are deterministic for a given `seed`.
+"""
+
+import itertools
+from collections.abc import Sequence
+
+import numpy as np
+from ommx.v1 import (
+    Constraint,
+    DecisionVariable,
+    Function,
+    Instance,
+    Linear,
+    Polynomial,
+    Quadratic,
+)
+
+
+def qubo(num_variables: int, density: float, seed: int = 0) -> Instance:
+    """
+    An unconstrained binary quadratic objective with about `density` of the
+    upper-triangular pairs set.
+    """
+    rng = np.random.default_rng(seed)
+    x = [
+        DecisionVariable.binary(i, name="x", subscripts=[i])
+        for i in range(num_variables)
+    ]
+    columns, rows = np.triu_indices(num_variables, k=1)
+    selected = rng.random(len(columns)) < density
+    objective = Quadratic(
+        columns=columns[selected].tolist(),
+        rows=rows[selected].tolist(),
+        values=rng.normal(size=int(selected.sum())).tolist(),
+        linear=Linear(
+            terms=dict(enumerate(rng.normal(size=num_variables).tolist())),
+            constant=0.0,
+        ),
+    )
+    return Instance.from_components(
+        decision_variables=x,
+        objective=Function(objective),
+        constraints=[],
+        sense=Instance.MINIMIZE,
+    )
+
+
+def knapsack(num_items: int, num_dimensions: int, seed: int = 0) -> Instance:
+    """
+    A multi-dimensional 0-1 knapsack: a linear objective and one dense capacity
+    constraint per dimension.
+    """
+    rng = np.random.default_rng(seed)
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(num_items)]
+    profits = rng.integers(1, 100, size=num_items)
+    constraints = []
+    for d in range(num_dimensions):
+        weights = rng.integers(1, 100, size=num_items)
+        constraints.append(
+            Constraint(
+                id=d,
+                function=Linear(
+                    terms=dict(enumerate(weights.tolist())),
+                    constant=-float(weights.sum() // 2),
+                ),
+                equality=Constraint.LESS_THAN_OR_EQUAL_TO_ZERO,
+                name="capacity",
+            )
+        )
+    return Instance.from_components(
+        decision_variables=x,
+        objective=Linear(terms=dict(enumerate(profits.tolist())), constant=0.0),
+        constraints=constraints,
+        sense=Instance.MAXIMIZE,
+    )
+
+
+def tsp(num_cities: int, seed: int = 0) -> Instance:
+    """
+    A travelling salesman problem in the one-hot formulation: `x[i, t]` is 1 if
+    city `i` is visited at step `t`, with one-hot constraints on every city and
+    every step, and a quadratic tour length objective.
+    """
+    rng = np.random.default_rng(seed)
+    n = num_cities
+    x = [
+        DecisionVariable.binary(i * n + t, name="x", subscripts=[i, t])
+        for i in range(n)
+        for t in range(n)
+    ]
+    points = rng.random((n, 2))
+    distances = np.linalg.norm(points[:, None, :] - points[None, :, :], axis=-1)
+
+    columns = []
+    rows = []
+    values = []
+    for i, j in itertools.permutations(range(n), 2):
+        for t in range(n):
+            columns.append(i * n + t)
+            rows.append(j * n + (t + 1) % n)
+            values.append(float(distances[i, j]))
+    objective = Quadratic(
+        columns=columns, rows=rows, values=values, linear=Linear(terms={}, constant=0)
+    )
+
+    constraints = []
+    for i in range(n):
+        constraints.append(
+            Constraint(
+                id=i,
+                function=Linear(terms={i * n + t: 1 for t in range(n)}, constant=-1),
+                equality=Constraint.EQUAL_TO_ZERO,
+                name="one_step",
+                subscripts=[i],
+            )
+        )
+    for t in range(n):
+        constraints.append(
+            Constraint(
+                id=n + t,
+                function=Linear(terms={i * n + t: 1 for i in range(n)}, constant=-1),
+                equality=Constraint.EQUAL_TO_ZERO,
+                name="one_city",
+                subscripts=[t],
+            )
+        )
+    return Instance.from_components(
+        decision_variables=x,
+        objective=Function(objective),
+        constraints=constraints,
+        sense=Instance.MINIMIZE,
+    )
+
+
+def set_cover(
+    num_elements: int, num_sets: int, max_size: int = 10, seed: int = 0
+) -> Instance:
+    """
+    A weighted set cover: a linear cost objective and one covering constraint per
+    element, over 3 to `max_size` of the sets chosen at random. Many small constraints,
+    as in assignment and scheduling problems.
+    """
+    rng = np.random.default_rng(seed)
+    x = [DecisionVariable.binary(j, name="x", subscripts=[j]) for j in range(num_sets)]
+    costs = rng.integers(1, 100, size=num_sets)
+    constraints = []
+    for i in range(num_elements):
+        size = int(rng.integers(3, max_size + 1))
+        sets = rng.choice(num_sets, size, replace=False)
+        constraints.append(
+            Constraint(
+                id=i,
+                # sum_j x_j >= 1
+                function=Linear(terms={j: -1 for j in sets.tolist()}, constant=1),
+                equality=Constraint.LESS_THAN_OR_EQUAL_TO_ZERO,
+                name="cover",
+                subscripts=[i],
+            )
+        )
+    return Instance.from_components(
+        decision_variables=x,
+        objective=Linear(terms=dict(enumerate(costs.tolist())), constant=0.0),
+        constraints=constraints,
+        sense=Instance.MINIMIZE,
+    )
+
+
+def higher_order(
+    num_variables: int, num_terms: int, degree: int, seed: int = 0
+) -> Instance:
+    """
+    Integer variables with a random objective of up to `num_terms` monomials of the
+    given degree, and one constraint of the same shape per 10 variables.
+    """
+    rng = np.random.default_rng(seed)
+    x = [
+        DecisionVariable.integer(i, lower=0, upper=3, name="x", subscripts=[i])
+        for i in range(num_variables)
+    ]
+
+    def random_polynomial(constant: float) -> Polynomial:
+        ids = np.sort(rng.integers(num_variables, size=(num_terms, degree)), axis=1)
+        # Monomials with a repeated variable would have a lower degree.
+        ids = ids[np.all(np.diff(ids, axis=1) > 0, axis=1)]
+        terms: dict[Sequence[int], float] = {
+            tuple(key): value
+            for key, value in zip(ids.tolist(), rng.normal(size=len(ids)).tolist())
+        }
+        terms[()] = constant
+        return Polynomial(terms=terms)
+
+    constraints = [
+        Constraint(
+            id=k,
+            function=random_polynomial(-1.0),
+            equality=Constraint.LESS_THAN_OR_EQUAL_TO_ZERO,
+            name="bound",
+            subscripts=[k],
+        )
+        for k in range(num_variables // 10)
+    ]
+    return Instance.from_components(
+        decision_variables=x,
+        objective=Function(random_polynomial(0.0)),
+        constraints=constraints,
+        sense=Instance.MINIMIZE,
+    )
+
+
+SIZES = {
+    "qubo": {
+        "small": dict(num_variables=100, density=0.1),
+        "medium": dict(num_variables=500, density=0.1),
+        "large": dict(num_variables=2000, density=0.05),
+    },
+    "knapsack": {
+        "small": dict(num_items=100, num_dimensions=5),
+        "medium": dict(num_items=2000, num_dimensions=20),
+        "large": dict(num_items=20000, num_dimensions=50),
+    },
+    "tsp": {
+        "small": dict(num_cities=8),
+        "medium": dict(num_cities=25),
+        "large": dict(num_cities=50),
+    },
+    "set_cover": {
+        "small": dict(num_elements=1000, num_sets=500),
+        "medium": dict(num_elements=10000, num_sets=5000),
+        "large": dict(num_elements=100000, num_sets=20000),
+    },
+    "higher_order": {
+        "small": dict(num_variables=100, num_terms=100, degree=3),
+        "medium": dict(num_variables=1000, num_terms=300, degree=3),
+        "large": dict(num_variables=5000, num_terms=1000, degree=4),
+    },
+}
+"""
+Generator arguments for each problem and size.
+"""
+
+GENERATORS = {
+    "qubo": qubo,
+    "knapsack": knapsack,
+    "tsp": tsp,
+    "set_cover": set_cover,
+    "higher_order": higher_order,
+}
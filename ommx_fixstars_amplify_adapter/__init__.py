@@ -1,9 +1,54 @@
+import importlib
+import typing
+
 from .exception import OMMXFixstarsAmplifyAdapterError
-from .adapter import OMMXFixstarsAmplifyAdapter
-from .amplify_to_ommx import model_to_instance
+
+if typing.TYPE_CHECKING:
+    from .adapter import OMMXFixstarsAmplifyAdapter
+    from .amplify_to_ommx import model_to_instance, write_instance
+    from .annealing import LocalAnnealingClient, LocalAnnealingParameters
+    from .cache import CacheStats, ModelCache, SolutionCache, instance_digest
+    from .stats import ConversionStats, StatsSink
+
+# The submodules import amplify and ommx.v1, which take most of the import time,
+# so they are only imported when one of their names is first accessed.
+_LAZY_NAMES = {
+    "CacheStats": ".cache",
+    "ConversionStats": ".stats",
+    "ModelCache": ".cache",
+    "instance_digest": ".cache",
+    "LocalAnnealingClient": ".annealing",
+    "LocalAnnealingParameters": ".annealing",
+    "model_to_instance": ".amplify_to_ommx",
+    "OMMXFixstarsAmplifyAdapter": ".adapter",
+    "SolutionCache": ".cache",
+    "StatsSink": ".stats",
+    "write_instance": ".amplify_to_ommx",
+}
 
 __all__ = [
+    "CacheStats",
+    "ConversionStats",
+    "ModelCache",
+    "instance_digest",
+    "LocalAnnealingClient",
+    "LocalAnnealingParameters",
     "model_to_instance",
     "OMMXFixstarsAmplifyAdapter",
     "OMMXFixstarsAmplifyAdapterError",
+    "SolutionCache",
+    "StatsSink",
+    "write_instance",
 ]
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_NAMES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES))
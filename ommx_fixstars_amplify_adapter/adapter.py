@@ -1,4 +1,21 @@
+import contextlib
+import copy
+import functools
+import itertools
+import queue
+import typing
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, replace
+
 import amplify
+import numpy as np
 
 from ommx.v1 import (
     Solution,
@@ -6,28 +23,309 @@ from ommx.v1 import (
     DecisionVariable,
     Constraint,
     Function,
+    Samples,
+    SampleSet,
     State,
 )
 from ommx.adapter import SolverAdapter
 
+from .cache import ModelCache, SolutionCache, _instance_digest
 from .exception import OMMXFixstarsAmplifyAdapterError
+from .decompose import decompose
+from .presolve import presolve
+from .stats import ConversionStats, StatsSink
+
+if typing.TYPE_CHECKING:
+    import asyncio
+    import mmap
+
+    from ommx.artifact import Artifact, Descriptor
+
+CONSTRAINT_CHUNK_SIZE = 4096
+"""
+Number of constraints per task when the constraints are converted with an executor.
+"""
+
+BULK_POLY_MIN_TERMS = 100
+"""
+Smallest number of terms for which a function of degree <= 2 is converted in bulk with
+`amplify.einsum`. Each einsum has a fixed cost of some tens of microseconds, so smaller
+functions are built term by term.
+"""
+
+_MODEL_ATTRIBUTES = (
+    "variable_index",
+    "variable_map",
+    "_variable_array",
+    "_variables",
+    "_variable_ids",
+    "_sorted_positions",
+    "_sorted_ids",
+    "_model_instance",
+    "_fixed_values",
+    "_binary_ids",
+)
+"""
+Attributes set while building the amplify model, other than the model itself.
+They are shared between adapters created from the same `ModelCache` entry.
+"""
+
+_LAZY_ATTRIBUTES = frozenset(("model",) + _MODEL_ATTRIBUTES)
+"""
+Attributes of `OMMXFixstarsAmplifyAdapter` that trigger building the model.
+"""
+
+_INSTANCE_MEDIA_TYPE = "application/org.ommx.v1.instance"
 
 
 class OMMXFixstarsAmplifyAdapter(SolverAdapter):
-    def __init__(self, ommx_instance: Instance):
+    def __init__(
+        self,
+        ommx_instance: Instance,
+        *,
+        batch_variables: bool = False,
+        variable_names: bool = True,
+        model_cache: ModelCache | None = None,
+        executor: Executor | None = None,
+        stats_sink: StatsSink | None = None,
+        presolve: bool = False,
+    ):
         """
+        The amplify model is not built here, but on first access of :attr:`solver_input`
+        (or `model`, `variable_index` and `variable_map`), e.g. when solving. Errors in
+        the instance are raised at that point.
+
         :param ommx_instance: The ommx.v1.Instance to solve.
+        :param batch_variables: Create the decision variables with one `VariableGenerator.array` call
+            per group of variables sharing the same kind and bounds, instead of one `scalar` call per
+            variable. The amplify variables are then ordered by group rather than as in the instance.
+            The names are assigned one variable at a time afterwards, so this only pays off with
+            `variable_names=False`.
+        :param variable_names: Give each amplify variable a human-readable name built from the OMMX
+            name and subscripts. If `False`, the names can still be assigned later with
+            :meth:`assign_variable_names`.
+        :param model_cache: Reuse the amplify model built for an identical instance with the
+            same options, if it is in the cache, and store the model built otherwise. Each
+            adapter gets its own copy of the cached model, but shares its variables and
+            `variable_index` and `variable_map` with the other adapters of the entry, see
+            :class:`ModelCache`.
+        :param executor: Convert the constraints in chunks of :data:`CONSTRAINT_CHUNK_SIZE`
+            with this executor, e.g. a `concurrent.futures.ProcessPoolExecutor`. It must not
+            be shut down before the model is built. The workers
+            extract the coefficients of the constraints from their serialized form, and the
+            amplify constraints are then assembled in order in the calling thread, so the
+            model is the same as without an executor. Only the extraction runs in parallel,
+            which bounds the speedup to about 2x however many workers there are, and
+            serializing the constraints for the workers makes it slower on a single CPU.
+        :param stats_sink: Called with the stage name and :attr:`stats` each time a stage
+            of building, solving or decoding completes, e.g. to forward them to a metrics system.
+        :param presolve: Reduce the instance with :func:`~ommx_fixstars_amplify_adapter.presolve.presolve`
+            before building the model: fixed variables are substituted, constraints on a single
+            variable become bounds, and redundant constraints are dropped. The eliminated
+            variables are not in the model nor in `variable_index` and `variable_map`, and
+            their values are restored when decoding.
         """
         self.instance = ommx_instance
+        self.stats = ConversionStats(sink=stats_sink)
+        """Timings and sizes of the conversion, see :class:`ConversionStats`."""
+        self._batch_variables = batch_variables
+        self._variable_names = variable_names
+        self._executor = executor
+        self._model_cache = model_cache
+        self._presolve = presolve
+        # The instance parsed by `from_bytes` and its serialized form.
+        self._instance_bytes: tuple[Instance, bytes] | None = None
+        self._building = False
+
+    def __getattr__(self, name: str):
+        # Only called for attributes that are not set: the model and the attributes
+        # built with it are created on first access.
+        if name in _LAZY_ATTRIBUTES and not self._building:
+            self._building = True
+            try:
+                self._load_model()
+            finally:
+                self._building = False
+            return getattr(self, name)
+        raise AttributeError(
+            f"{type(self).__name__!r} object has no attribute {name!r}"
+        )
+
+    def _load_model(self):
+        model_cache = self._model_cache
+        if model_cache is None:
+            self._build_model()
+            return
+
+        key, size_bytes = _instance_digest(
+            self.instance,
+            self._batch_variables,
+            self._variable_names,
+            self._presolve,
+        )
+        cached = model_cache.get(key)
+        if cached is None:
+            self._build_model()
+            cached = (
+                self.model.copy(),
+                {name: getattr(self, name) for name in _MODEL_ATTRIBUTES},
+                replace(self.stats, timings={}, sink=None),
+            )
+            model_cache.put(key, cached, size_bytes)
+        else:
+            model, attributes, stats = cached
+            self.stats = replace(stats, timings={}, sink=self.stats.sink)
+            with self.stats.stage("model_cache"):
+                self.model = model.copy()
+                for name, value in attributes.items():
+                    setattr(self, name, value)
+
+    def _build_model(self):
+        try:
+            self._build_model_parts()
+        except BaseException:
+            # Drop the parts built so far, so that the next access builds the model
+            # again and raises again, instead of returning an incomplete model.
+            for name in _LAZY_ATTRIBUTES:
+                vars(self).pop(name, None)
+            raise
+
+    def _build_model_parts(self):
         self.model = amplify.Model()
+        self.stats.num_terms = 0
+        self.stats.max_degree = 0
+        self.stats.reduced_terms = 0
+        self.stats.reduced_degree = 0
+        if self._presolve:
+            with self.stats.stage("presolve"):
+                presolved = presolve(self.instance)
+            self._model_instance = presolved.instance
+            self._fixed_values = presolved.fixed_values
+        else:
+            self._model_instance = self.instance
+            self._fixed_values = {}
+        # Taken once: every access of the property collects the variables anew.
+        used_decision_variables = self._model_instance.used_decision_variables
+        self._binary_ids = frozenset(
+            var.id
+            for var in used_decision_variables
+            if var.kind == DecisionVariable.BINARY
+        )
+        self._objective = self._reduce_binary_power(self._model_instance.objective)
+        with self.stats.stage("decision_variables"):
+            self._set_decision_variables(used_decision_variables)
+            self.stats.num_variables = len(self.variable_index)
+        with self.stats.stage("objective"):
+            self._set_objective()
+        with self.stats.stage("constraints"):
+            self._set_constraints()
+            self.stats.num_constraints = len(self.model.constraints)
+
+    @classmethod
+    def from_bytes(
+        cls, data: "bytes | memoryview | mmap.mmap", **options: typing.Any
+    ) -> "OMMXFixstarsAmplifyAdapter":
+        """
+        Create an adapter from a serialized ommx.v1.Instance, e.g. a memory-mapped file.
+
+        The constraints of the amplify model are built from the coefficient arrays of
+        the serialized instance, without creating the `Constraint` and `Function`
+        objects of the instance and their dictionaries of terms. Constraints of degree
+        higher than 2 are still converted from the instance. With `presolve`, the
+        model is built from the presolved instance as usual.
+
+        This saves time, not memory. The instance is still parsed into
+        :attr:`instance`, and `data` is kept and parsed a second time into protobuf
+        messages while the model is built, so the peak memory is about the same as with
+        `OMMXFixstarsAmplifyAdapter(Instance.from_bytes(data))`.
+
+        If constraints of :attr:`instance` are relaxed, restored or added before the
+        model is built, the model is built from the instance as usual. Other in-place
+        changes of the constraints are not detected: pass the changed instance to
+        :meth:`update` instead.
+
+        :param data: The serialized instance. It is copied once if it is not `bytes`.
+        :param options: Keyword arguments of :class:`OMMXFixstarsAmplifyAdapter`.
+
+        Example:
+        =========
+
+        .. doctest::
+
+            >>> from ommx_fixstars_amplify_adapter import OMMXFixstarsAmplifyAdapter
+            >>> from ommx.v1 import Instance, DecisionVariable
+            >>>
+            >>> x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(3)]
+            >>> ommx_instance = Instance.from_components(
+            ...     decision_variables=x,
+            ...     objective=x[0] + x[1] + x[2],
+            ...     constraints=[x[0] + 2 * x[1] + x[2] <= 2],
+            ...     sense=Instance.MAXIMIZE,
+            ... )
+            >>> adapter = OMMXFixstarsAmplifyAdapter.from_bytes(ommx_instance.to_bytes())
+            >>> poly, condition, bound = adapter.solver_input.constraints[0].conditional
+            >>> print(poly, condition, bound)
+            x_{0} + 2 x_{1} + x_{2} - 2 LE 0.0
+        """
+        if not isinstance(data, bytes):
+            data = bytes(data)
+        instance = Instance.from_bytes(data)
+        adapter = cls(instance, **options)
+        adapter._instance_bytes = (instance, data)
+        return adapter
+
+    @classmethod
+    def from_artifact(
+        cls,
+        artifact: "Artifact",
+        descriptor: "Descriptor | None" = None,
+        **options: typing.Any,
+    ) -> "OMMXFixstarsAmplifyAdapter":
+        """
+        Create an adapter from an instance stored in an OMMX artifact, see
+        :meth:`from_bytes`.
 
-        self._set_decision_variables()
-        self._set_objective()
-        self._set_constraints()
+        :param artifact: The artifact, e.g. from `ommx.artifact.Artifact.load`.
+        :param descriptor: The layer of the instance. Defaults to the only instance layer
+            of the artifact.
+        :param options: Keyword arguments of :class:`OMMXFixstarsAmplifyAdapter`.
+        """
+        if descriptor is None:
+            layers = [
+                layer
+                for layer in artifact.layers
+                if layer.media_type == _INSTANCE_MEDIA_TYPE
+            ]
+            if len(layers) != 1:
+                raise OMMXFixstarsAmplifyAdapterError(
+                    f"Expected one instance in the artifact, found {len(layers)}"
+                )
+            (descriptor,) = layers
+        elif descriptor.media_type != _INSTANCE_MEDIA_TYPE:
+            raise OMMXFixstarsAmplifyAdapterError(
+                f"Not an instance layer: {descriptor.media_type}"
+            )
+        adapter = cls.from_bytes(artifact.get_blob(descriptor), **options)
+        adapter.instance.annotations = descriptor.annotations
+        return adapter
+
+    def _solve_model(self, client: typing.Any) -> amplify.Result:
+        model = self.model
+        with self.stats.stage("solve"):
+            return amplify.solve(model, client)
 
     @classmethod
     def solve(
-        cls, ommx_instance: Instance, *, amplify_token: str = "", timeout: int = 1000
+        cls,
+        ommx_instance: Instance,
+        *,
+        amplify_token: str = "",
+        timeout: int = 1000,
+        model_cache: ModelCache | None = None,
+        stats_sink: StatsSink | None = None,
+        client: typing.Any = None,
+        solution_cache: SolutionCache | None = None,
+        initial_state: State | None = None,
     ) -> Solution:
         """Solve the given ommx.v1.Instance using Fixstars Amplify AE, returning an
         ommx.v1.Solution.
@@ -39,6 +337,18 @@ class OMMXFixstarsAmplifyAdapter(SolverAdapter):
         :param ommx_instance: The ommx.v1.Instance to solve.
         :param amplify_token: Token for instantiating the Fixstars Amplify AE Client, obtained from your Fixstars Amplify account.
         :param timeout: Timeout passed the client
+        :param model_cache: Cache of amplify models to reuse, see :class:`ModelCache`.
+        :param stats_sink: Called as each stage completes, see :class:`ConversionStats`.
+        :param client: Amplify client to solve with, instead of a Fixstars Amplify AE Client
+            created from `amplify_token` and `timeout`, e.g. a :class:`LocalAnnealingClient`
+            to solve offline.
+        :param solution_cache: Return the solution stored for the same instance, client
+            parameters and initial state, if there is one, and store the solution otherwise.
+            See :class:`SolutionCache`.
+        :param initial_state: Values to start the solver from, e.g. the solution of a
+            previous solve, see :meth:`initial_values`. The client must have an
+            `initial_values` parameter. It is set on a copy of the client, so `client` is
+            left unchanged.
 
         Example:
         =========
@@ -59,23 +369,378 @@ class OMMXFixstarsAmplifyAdapter(SolverAdapter):
             >>> token = "YOUR API TOKEN" # Set your API token
             >>> solution = OMMXFixstarsAmplifyAdapter.solve(ommx_instance, amplify_token=token) # doctest: +SKIP
         """
-        if amplify_token == "":
-            raise OMMXFixstarsAmplifyAdapterError(
-                "No Fixstars Amplify token specificed -- cannot instantiate client"
+        if client is None:
+            client = _amplify_ae_client(amplify_token, timeout)
+        key = (
+            solution_cache.key(ommx_instance, client, initial_state)
+            if solution_cache is not None
+            else None
+        )
+        if solution_cache is not None and key is not None:
+            solution = solution_cache.get(key)
+            if solution is not None:
+                return solution
+
+        adapter = cls(ommx_instance, model_cache=model_cache, stats_sink=stats_sink)
+        if initial_state is None:
+            result = adapter._solve_model(client)
+        else:
+            if not hasattr(client.parameters, "initial_values"):
+                raise OMMXFixstarsAmplifyAdapterError(
+                    f"{type(client).__name__} does not support initial values"
+                )
+            # Solve with a copy of the client and its parameters, so that the client
+            # can be shared with concurrent solves.
+            try:
+                client = copy.copy(client)
+                client.parameters = copy.copy(client.parameters)
+            except (TypeError, AttributeError) as e:
+                raise OMMXFixstarsAmplifyAdapterError(
+                    f"Cannot copy {type(client).__name__} to set initial values: {e}"
+                )
+            client.parameters.initial_values = adapter.initial_values(
+                initial_state, client
+            )
+            result = adapter._solve_model(client)
+        solution = adapter.decode(result)
+        if solution_cache is not None and key is not None:
+            solution_cache.put(key, solution)
+        return solution
+
+    @classmethod
+    async def solve_async(
+        cls,
+        ommx_instance: Instance,
+        *,
+        amplify_token: str = "",
+        timeout: int = 1000,
+        model_cache: ModelCache | None = None,
+        client: typing.Any = None,
+        semaphore: "asyncio.Semaphore | None" = None,
+        executor: Executor | None = None,
+        stats_sink: StatsSink | None = None,
+    ) -> Solution:
+        """Coroutine version of :meth:`solve`.
+
+        Building the model, solving it and decoding the result each run in `executor`,
+        so the event loop is not blocked. If the task is cancelled, the step in progress
+        runs to completion in the background and the remaining steps are skipped.
+
+        :param ommx_instance: The ommx.v1.Instance to solve.
+        :param amplify_token: Token for instantiating the Fixstars Amplify AE Client, obtained from your Fixstars Amplify account.
+        :param timeout: Timeout passed the client
+        :param model_cache: Cache of amplify models to reuse, see :class:`ModelCache`.
+        :param client: Amplify client to solve with, instead of a Fixstars Amplify AE Client
+            created from `amplify_token` and `timeout`. It is shared by concurrent solves,
+            so it must not be modified while they run.
+        :param semaphore: Semaphore shared between calls to limit the number of solves
+            in flight. Waiting for it does not occupy the executor.
+        :param executor: Executor to run the blocking steps in. Defaults to the default
+            executor of the event loop, whose number of threads also limits concurrency.
+        :param stats_sink: Called as each stage completes, see :class:`ConversionStats`.
+
+        Example:
+        =========
+
+        .. doctest::
+
+            >>> import asyncio
+            >>> from ommx_fixstars_amplify_adapter import OMMXFixstarsAmplifyAdapter
+            >>> from ommx.v1 import Instance, DecisionVariable
+            >>>
+            >>> x1 = DecisionVariable.integer(1, lower=0, upper=5)
+            >>> ommx_instance = Instance.from_components(
+            ...     decision_variables=[x1],
+            ...     objective=x1,
+            ...     constraints=[],
+            ...     sense=Instance.MINIMIZE,
+            ... )
+            >>> async def main(instances):
+            ...     semaphore = asyncio.Semaphore(16)
+            ...     return await asyncio.gather(*(
+            ...         OMMXFixstarsAmplifyAdapter.solve_async(
+            ...             instance, amplify_token="YOUR API TOKEN", semaphore=semaphore
+            ...         )
+            ...         for instance in instances
+            ...     ))
+            >>> solutions = asyncio.run(main([ommx_instance] * 3)) # doctest: +SKIP
+        """
+        import asyncio
+
+        if client is None:
+            client = _amplify_ae_client(amplify_token, timeout)
+
+        async with semaphore if semaphore is not None else contextlib.nullcontext():
+            loop = asyncio.get_running_loop()
+            adapter = await loop.run_in_executor(
+                executor,
+                functools.partial(
+                    cls,
+                    ommx_instance,
+                    model_cache=model_cache,
+                    stats_sink=stats_sink,
+                ),
             )
+            result = await loop.run_in_executor(executor, adapter._solve_model, client)
+            return await loop.run_in_executor(executor, adapter.decode, result)
+
+    @classmethod
+    def solve_many(
+        cls,
+        ommx_instances: Iterable[Instance],
+        *,
+        amplify_token: str = "",
+        timeout: int = 1000,
+        model_cache: ModelCache | None = None,
+        clients: Sequence[typing.Any] | None = None,
+        max_workers: int = 8,
+        ordered: bool = True,
+        stats_sink: StatsSink | None = None,
+    ) -> Iterator[tuple[int, Solution]]:
+        """Solve many ommx.v1.Instance, overlapping model building with solving.
+
+        Each instance is built, solved and decoded by one of `max_workers` threads.
+        A thread only holds a client while `amplify.solve` runs, so the models of
+        later instances are built while earlier ones are being solved. At most
+        `2 * max_workers` instances are taken from `ommx_instances` ahead of the
+        solutions consumed, so it can be a lazy iterable.
+
+        The first error raised while solving an instance is raised from the iterator,
+        and the instances not yet started are cancelled.
+
+        :param ommx_instances: The ommx.v1.Instance to solve.
+        :param amplify_token: Token for instantiating the Fixstars Amplify AE Client, obtained from your Fixstars Amplify account.
+        :param timeout: Timeout passed the client
+        :param model_cache: Cache of amplify models to reuse, see :class:`ModelCache`.
+        :param clients: Pool of Amplify clients to solve with. Each client is used by one
+            solve at a time. By default, `max_workers` Fixstars Amplify AE Clients are
+            created from `amplify_token` and `timeout`.
+        :param max_workers: Number of threads building, solving and decoding.
+        :param ordered: Yield the solutions in the order of `ommx_instances`. Otherwise
+            they are yielded as they complete.
+        :param stats_sink: Called as each stage of each instance completes, from the worker
+            threads, see :class:`ConversionStats`.
+        :return: Pairs of the position of the instance in `ommx_instances` and its solution.
+
+        Example:
+        =========
+
+        .. doctest::
+
+            >>> from ommx_fixstars_amplify_adapter import OMMXFixstarsAmplifyAdapter
+            >>> from ommx.v1 import Instance, DecisionVariable
+            >>>
+            >>> x1 = DecisionVariable.integer(1, lower=0, upper=5)
+            >>> ommx_instance = Instance.from_components(
+            ...     decision_variables=[x1],
+            ...     objective=x1,
+            ...     constraints=[],
+            ...     sense=Instance.MINIMIZE,
+            ... )
+            >>> token = "YOUR API TOKEN" # Set your API token
+            >>> for index, solution in OMMXFixstarsAmplifyAdapter.solve_many(
+            ...     [ommx_instance] * 3, amplify_token=token
+            ... ):  # doctest: +SKIP
+            ...     print(index, solution.objective)
+        """
+        if clients is None:
+            clients = [
+                _amplify_ae_client(amplify_token, timeout) for _ in range(max_workers)
+            ]
+        if len(clients) == 0:
+            raise OMMXFixstarsAmplifyAdapterError("No clients given to solve with")
+        client_pool: queue.SimpleQueue = queue.SimpleQueue()
+        for client in clients:
+            client_pool.put(client)
+
+        def solve_one(ommx_instance: Instance) -> Solution:
+            adapter = cls(ommx_instance, model_cache=model_cache, stats_sink=stats_sink)
+            client = client_pool.get()
+            try:
+                result = adapter._solve_model(client)
+            finally:
+                client_pool.put(client)
+            return adapter.decode(result)
+
+        instances = enumerate(ommx_instances)
+        pending: dict[Future, int] = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+            def submit(count: int):
+                for index, ommx_instance in itertools.islice(instances, count):
+                    pending[executor.submit(solve_one, ommx_instance)] = index
+
+            try:
+                submit(2 * max_workers)
+                while pending:
+                    if ordered:
+                        done = [next(iter(pending))]
+                    else:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index = pending.pop(future)
+                        solution = future.result()
+                        submit(1)
+                        yield index, solution
+            finally:
+                for future in pending:
+                    future.cancel()
 
-        adapter = cls(ommx_instance)
+    @classmethod
+    def solve_decomposed(
+        cls,
+        ommx_instance: Instance,
+        *,
+        amplify_token: str = "",
+        timeout: int = 1000,
+        model_cache: ModelCache | None = None,
+        clients: Sequence[typing.Any] | None = None,
+        max_workers: int = 8,
+        stats_sink: StatsSink | None = None,
+    ) -> Solution:
+        """Solve the independent parts of an ommx.v1.Instance as separate amplify models.
+
+        The instance is split into the connected components of its variable interaction
+        graph with :func:`~ommx_fixstars_amplify_adapter.decompose.decompose`, and the
+        components are solved concurrently with :meth:`solve_many`. Their states are
+        merged and evaluated on `ommx_instance`. Each component is solved with the full
+        `timeout`, so block-separable instances get smaller models within the same time.
+        An instance with a single component is solved as one model.
+
+        :param ommx_instance: The ommx.v1.Instance to solve.
+        :param amplify_token: Token for instantiating the Fixstars Amplify AE Client, obtained from your Fixstars Amplify account.
+        :param timeout: Timeout passed the client
+        :param model_cache: Cache of amplify models to reuse, see :class:`ModelCache`.
+        :param clients: Pool of Amplify clients to solve the components with, see
+            :meth:`solve_many`.
+        :param max_workers: Number of threads building, solving and decoding components.
+        :param stats_sink: Called as each stage of each component completes, see
+            :class:`ConversionStats`.
+
+        Example:
+        =========
+
+        .. doctest::
+
+            >>> from ommx_fixstars_amplify_adapter import OMMXFixstarsAmplifyAdapter
+            >>> from ommx.v1 import Instance, DecisionVariable
+            >>>
+            >>> x = [DecisionVariable.binary(i) for i in range(4)]
+            >>> ommx_instance = Instance.from_components(
+            ...     decision_variables=x,
+            ...     objective=x[0] * x[1] + x[2] * x[3],
+            ...     constraints=[x[0] + x[1] == 1, x[2] + x[3] == 1],
+            ...     sense=Instance.MINIMIZE,
+            ... )
+            >>> token = "YOUR API TOKEN" # Set your API token
+            >>> solution = OMMXFixstarsAmplifyAdapter.solve_decomposed(
+            ...     ommx_instance, amplify_token=token
+            ... )  # doctest: +SKIP
+        """
+        entries: dict[int, float] = {}
+        for _, solution in cls.solve_many(
+            decompose(ommx_instance),
+            amplify_token=amplify_token,
+            timeout=timeout,
+            model_cache=model_cache,
+            clients=clients,
+            max_workers=max_workers,
+            ordered=False,
+            stats_sink=stats_sink,
+        ):
+            entries.update(solution.state.entries)
+        return ommx_instance.evaluate(State(entries=entries))
+
+    def update(self, ommx_instance: Instance):
+        """
+        Replace the instance of this adapter, patching the amplify model in place.
+
+        Only the parts of the model that differ from the current instance are rebuilt:
+        the objective if it or the sense changed, and each constraint whose function,
+        equality or metadata changed, matched by constraint id. Unchanged constraints
+        keep their `amplify.Constraint`, including any weight set on it. If the used
+        decision variables differ in any way, or the adapter was created with
+        `presolve=True`, the whole model is rebuilt as in the constructor.
 
-        client = amplify.AmplifyAEClient()
-        client.token = amplify_token
-        client.parameters.time_limit_ms = timeout
+        Example:
+        =========
 
-        result = amplify.solve(adapter.solver_input, client)
-        return adapter.decode(result)
+        .. doctest::
+
+            >>> from ommx_fixstars_amplify_adapter import OMMXFixstarsAmplifyAdapter
+            >>> from ommx.v1 import Instance, DecisionVariable
+            >>>
+            >>> x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(2)]
+            >>> def make_instance(capacity):
+            ...     return Instance.from_components(
+            ...         decision_variables=x,
+            ...         objective=x[0] + 2 * x[1],
+            ...         constraints=[(x[0] + x[1] <= capacity).set_id(0)],
+            ...         sense=Instance.MAXIMIZE,
+            ...     )
+            >>> adapter = OMMXFixstarsAmplifyAdapter(make_instance(1))
+            >>> adapter.update(make_instance(2))
+            >>> poly, condition, bound = adapter.model.constraints[0].conditional
+            >>> print(poly)
+            x_{0} + x_{1} - 2
+        """
+        current = self.instance
+        self.instance = ommx_instance
+        self._instance_bytes = None
+        if "model" not in self.__dict__:
+            # Not built yet, so it will be built from the new instance.
+            return
+        if self._presolve or _decision_variables_bytes(
+            current
+        ) != _decision_variables_bytes(ommx_instance):
+            self._build_model()
+            return
+
+        self._model_instance = ommx_instance
+        with self.stats.stage("update"):
+            self._update_model(current)
+
+    def _update_model(self, current: Instance):
+        self.stats.num_terms = 0
+        self.stats.max_degree = 0
+        self.stats.reduced_terms = 0
+        self.stats.reduced_degree = 0
+        objective = self.instance.objective
+        if (
+            current.sense != self.instance.sense
+            or current.objective.to_bytes() != objective.to_bytes()
+        ):
+            self._objective = self._reduce_binary_power(objective)
+            self.model.objective = self._objective_poly()
+        else:
+            self.stats.add_function(objective.num_terms(), objective.degree())
+
+        # The constraints of the model are in the order of the current instance,
+        # unless the model has been modified since.
+        amplify_constraints = list(self.model.constraints)
+        reusable = {}
+        if len(amplify_constraints) == len(current.constraints):
+            reusable = {
+                constr.id: (constr.to_bytes(), amplify_constraint)
+                for constr, amplify_constraint in zip(
+                    current.constraints, amplify_constraints
+                )
+            }
+        constraints = []
+        for constr in self.instance.constraints:
+            old = reusable.get(constr.id)
+            if old is not None and old[0] == constr.to_bytes():
+                constraints.append(old[1])
+                func = constr.function
+                self.stats.add_function(func.num_terms(), func.degree())
+            else:
+                constraints.append(self._constraint_to_amplify(constr))
+        self.model.constraints = amplify.ConstraintList(constraints)
+        self.stats.num_constraints = len(constraints)
 
     @property
     def solver_input(self) -> amplify.Model:
-        """The Amplify model generated from this OMMX instance"""
+        """The Amplify model generated from this OMMX instance, built on first access"""
         return self.model
 
     def decode(self, data: amplify.Result) -> Solution:
@@ -90,6 +755,10 @@ class OMMXFixstarsAmplifyAdapter(SolverAdapter):
         effectively the same problem as the OMMX instance used to create the
         adapter.
 
+        If Amplify found no feasible solution, the best of the infeasible ones is
+        decoded, and the returned solution has `feasible` set to `False`. Amplify does
+        not report unboundedness, since all its integer and real variables are bounded.
+
         Example:
         =========
         The following example shows how to solve an unconstrained linear optimization problem with `x` as the objective function.
@@ -117,16 +786,19 @@ class OMMXFixstarsAmplifyAdapter(SolverAdapter):
             >>> solution = adapter.decode(result)  # doctest: +SKIP
         """
 
-        # TODO infeasible/unbounded detection
-        state = self.decode_to_state(data)
-        solution = self.instance.evaluate(state)
-
-        return solution
+        best = _best_solution(data, "ommx.v1.Solution")
+        with self.stats.stage("decode"):
+            state = self._values_to_state(best.values)
+        with self.stats.stage("evaluate"):
+            return self.instance.evaluate(state)
 
     def decode_to_state(self, data: amplify.Result) -> State:
         """
         Create an ommx.v1.State from an amplify.Result.
 
+        As with :meth:`decode`, the best of the infeasible solutions is used if Amplify
+        found no feasible solution.
+
         Example:
         =========
         The following example shows how to solve an unconstrained linear optimization problem with `x` as the objective function.
@@ -153,76 +825,448 @@ class OMMXFixstarsAmplifyAdapter(SolverAdapter):
             >>> result = amplify.solve(model, client)  # doctest: +SKIP
             >>> state = adapter.decode_to_state(result)  # doctest: +SKIP
         """
+        best = _best_solution(data, "ommx.v1.State")
+        with self.stats.stage("decode"):
+            return self._values_to_state(best.values)
+
+    def decode_to_sampleset(self, data: amplify.Result) -> SampleSet:
+        """
+        Create an ommx.v1.SampleSet from all the solutions in an amplify.Result.
+
+        Unlike :meth:`decode`, which only uses `data.best`, every solution returned
+        by Amplify is kept, including the ones Amplify marks as infeasible. Sample
+        ids are the positions of the solutions in `data.solutions`. Identical
+        solutions are evaluated only once.
+
+        Example:
+        =========
+        The following example shows how to solve an unconstrained linear optimization problem with `x` as the objective function.
+
+        .. doctest::
+
+            >>> from ommx_fixstars_amplify_adapter import OMMXFixstarsAmplifyAdapter
+            >>> from ommx.v1 import Instance, DecisionVariable
+            >>>
+            >>> x1 = DecisionVariable.integer(1, lower=0, upper=5)
+            >>> ommx_instance = Instance.from_components(
+            ...     decision_variables=[x1],
+            ...     objective=x1,
+            ...     constraints=[],
+            ...     sense=Instance.MINIMIZE,
+            ... )
+            >>>
+            >>> adapter = OMMXFixstarsAmplifyAdapter(ommx_instance)
+            >>> model = adapter.solver_input
+            >>> client = amplify.AmplifyAEClient()
+            >>> client.token = "YOUR API TOKEN" # Set your API token
+            >>> client.parameters.time_limit_ms = 1000
+            >>> result = amplify.solve(model, client)  # doctest: +SKIP
+            >>> sample_set = adapter.decode_to_sampleset(result)  # doctest: +SKIP
+        """
+        filter_solution = data.filter_solution
+        data.filter_solution = False
         try:
-            return State(
-                entries={
-                    key: value.evaluate(data.best.values)
-                    for key, value in self.variable_map.items()
-                }
-            )
+            with self.stats.stage("decode"):
+                values = np.array(
+                    [
+                        self._variable_array.evaluate(solution.values)
+                        for solution in data.solutions
+                    ],
+                    dtype=np.float64,
+                ).reshape(-1, len(self._variable_ids))
+                samples = self._values_to_samples(values)
         except RuntimeError as e:
             raise OMMXFixstarsAmplifyAdapterError(
-                f"Failed to create ommx.v1.State: {str(e)}"
+                f"Failed to create ommx.v1.SampleSet: {str(e)}"
             )
+        finally:
+            data.filter_solution = filter_solution
+
+        with self.stats.stage("evaluate"):
+            return self.instance.evaluate_samples(samples)
+
+    def _values_to_samples(self, values: np.ndarray) -> Samples:
+        """
+        Build ommx.v1.Samples from a (number of samples) x (number of variables)
+        array, sharing one state between identical rows.
+        """
+        samples = Samples({})
+        if values.shape[0] == 0:
+            return samples
+
+        unique, inverse = np.unique(values, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order = np.argsort(inverse, kind="stable")
+        sample_ids = np.split(order, np.cumsum(np.bincount(inverse))[:-1])
+        variable_ids = self._variable_ids.tolist()
+        for row, ids in zip(unique, sample_ids):
+            entries = dict(zip(variable_ids, row.tolist()))
+            entries.update(self._fixed_values)
+            samples.append(ids.tolist(), State(entries=entries))
+        return samples
+
+    def _values_to_state(self, values: amplify.Values) -> State:
+        evaluated = self._variable_array.evaluate(values)
+        entries = dict(zip(self._variable_ids.tolist(), evaluated.tolist()))
+        entries.update(self._fixed_values)
+        return State(entries=entries)
+
+    def initial_values(self, state: State, client: typing.Any) -> dict[int, float]:
+        """
+        Translate an ommx.v1.State, e.g. a previous solution, into initial values for
+        `client`, keyed by the ids of the variables of the problem the client receives.
+
+        Amplify converts the model to the degrees accepted by the client before it is
+        sent, so the values are mapped through the same conversion. The binary variables
+        encoding an integer or real variable are set greedily from the largest
+        coefficient to approximate its value. Decision variables missing from `state`,
+        or eliminated by presolve, have no initial value.
+
+        :meth:`solve` passes these values as `client.parameters.initial_values`, for
+        clients that support it such as :class:`LocalAnnealingClient`.
+        """
+        _, mapping = self.model.to_intermediate_model(client.acceptable_degrees)
+        encodings = {}
+        for variable, encoded in mapping.items():
+            (amplify_variable,) = variable.variables
+            encodings[amplify_variable.id] = encoded
+
+        values = {}
+        entries = state.entries
+        for id, position in self.variable_index.items():
+            if id not in entries:
+                continue
+            variable = self._amplify_variable(position)
+            encoded = encodings.get(variable.id)
+            if encoded is None:
+                continue
+            terms = encoded.as_dict()
+            remaining = entries[id] - terms.pop((), 0.0)
+            if any(len(ids) != 1 or c <= 0 for ids, c in terms.items()):
+                continue
+            for (encoded_id,), coefficient in sorted(
+                terms.items(), key=lambda term: -term[1]
+            ):
+                if coefficient <= remaining + 1e-9:
+                    values[encoded_id] = 1.0
+                    remaining -= coefficient
+                else:
+                    values[encoded_id] = 0.0
+        return values
+
+    def assign_variable_names(self):
+        """
+        Name every amplify variable after its OMMX decision variable, e.g. `x_{0, 1}`.
+
+        This is done on construction unless the adapter was created with `variable_names=False`.
+        """
+        self._name_variables(self._model_instance.used_decision_variables)
+
+    def _name_variables(self, decision_variables: list[DecisionVariable]):
+        for var in decision_variables:
+            label = _make_variable_label(var)
+            # Keep the default name of amplify for unnamed variables.
+            if label:
+                amplify_var = self._amplify_variable(self.variable_index[var.id])
+                amplify_var.name = label
+
+    def _amplify_variable(self, position: int) -> amplify.Variable:
+        """
+        The amplify variable at `position` of `_variable_array`.
+        """
+        poly = typing.cast(amplify.Poly, self._variable_array[position])
+        return poly.as_variable()
+
+    def _set_decision_variables(self, used_decision_variables: list[DecisionVariable]):
+        self._variables: list[amplify.Poly] | None = None
+        if self._batch_variables:
+            self._generate_variable_arrays(used_decision_variables)
+        else:
+            self._generate_variable_scalars(used_decision_variables)
+        self.variable_map = _VariableMap(self.variable_index, self._variable_array)
 
-    def _set_decision_variables(self):
-        self.variable_map = {}
+        # Decode plan: the OMMX id of the amplify variable at each position of
+        # `_variable_array`, so that a result is decoded with a single gather.
+        # Positions are assigned in insertion order of `variable_index`.
+        self._variable_ids = np.fromiter(
+            self.variable_index.keys(), dtype=np.uint64, count=len(self.variable_index)
+        )
+        # Lookup tables for the bulk path of `_function_to_poly`: the OMMX ids
+        # sorted for `np.searchsorted`, and their positions in `_variable_array`.
+        self._sorted_positions = np.argsort(self._variable_ids, kind="stable")
+        self._sorted_ids = self._variable_ids[self._sorted_positions]
+
+    def _generate_variable_scalars(
+        self, used_decision_variables: list[DecisionVariable]
+    ):
+        self.variable_index = {}
+        variables = []
         gen = amplify.VariableGenerator()
-        for var in self.instance.used_decision_variables:
-            if var.kind == DecisionVariable.BINARY:
-                amplify_var = gen.scalar(
-                    "Binary",
-                    name=_make_variable_label(var),
-                )
-            elif var.kind == DecisionVariable.INTEGER:
-                amplify_var = gen.scalar(
-                    "Integer",
-                    bounds=(var.bound.lower, var.bound.upper),
-                    name=_make_variable_label(var),
-                )
-            elif var.kind == DecisionVariable.CONTINUOUS:
-                amplify_var = gen.scalar(
-                    "Real",
-                    bounds=(var.bound.lower, var.bound.upper),
-                    name=_make_variable_label(var),
-                )
-            else:
-                raise OMMXFixstarsAmplifyAdapterError(
-                    f"Not supported decision variable kind: {var.kind}"
-                )
-            self.variable_map[var.id] = amplify_var
+        for var in used_decision_variables:
+            variable_type, bounds = _variable_type(var)
+            name = _make_variable_label(var) if self._variable_names else ""
+            self.variable_index[var.id] = len(variables)
+            variables.append(gen.scalar(variable_type, bounds=bounds, name=name))
+        self._variable_array = amplify.PolyArray(variables)
+        self._variables = variables
+
+    def _generate_variable_arrays(
+        self, used_decision_variables: list[DecisionVariable]
+    ):
+        groups: dict[tuple, list[int]] = {}
+        for var in used_decision_variables:
+            groups.setdefault(_variable_type(var), []).append(var.id)
+
+        self.variable_index = {}
+        arrays = []
+        gen = amplify.VariableGenerator()
+        for (variable_type, bounds), ids in groups.items():
+            arrays.append(gen.array(variable_type, len(ids), bounds=bounds))
+            for id in ids:
+                self.variable_index[id] = len(self.variable_index)
+
+        if len(arrays) == 1:
+            self._variable_array = arrays[0]
+        else:
+            self._variables = [poly for array in arrays for poly in array.to_list()]
+            self._variable_array = amplify.PolyArray(self._variables)
+
+        if self._variable_names:
+            self._name_variables(used_decision_variables)
 
     def _set_objective(self):
-        obj_poly = self._function_to_poly(self.instance.objective)
-        if self.instance.sense == Instance.MINIMIZE:
-            self.model += obj_poly
-        elif self.instance.sense == Instance.MAXIMIZE:
-            self.model += -obj_poly
+        self.model += self._objective_poly()
+
+    def _objective_poly(self) -> amplify.Poly:
+        obj_poly = self._function_to_poly(self._objective)
+        if self._model_instance.sense == Instance.MINIMIZE:
+            return obj_poly
+        elif self._model_instance.sense == Instance.MAXIMIZE:
+            return -obj_poly
         else:
             raise OMMXFixstarsAmplifyAdapterError(
-                f"Unknown sense: {self.instance.sense}"
+                f"Unknown sense: {self._model_instance.sense}"
             )
 
     def _set_constraints(self):
-        for constr in self.instance.constraints:
-            function_poly = self._function_to_poly(constr.function)
-            if constr.equality == Constraint.EQUAL_TO_ZERO:
-                self.model += amplify.equal_to(
-                    function_poly, 0, label=_make_constraint_label(constr)
-                )
-            elif constr.equality == Constraint.LESS_THAN_OR_EQUAL_TO_ZERO:
-                self.model += amplify.less_equal(
-                    function_poly, 0, label=_make_constraint_label(constr)
-                )
+        serialized = self._instance_bytes
+        # The serialized instance is only needed to build the model.
+        self._instance_bytes = None
+        if (
+            serialized is not None
+            and serialized[0] is self._model_instance
+            and self._set_constraints_from_bytes(serialized[1])
+        ):
+            return
+        if self._executor is not None:
+            self._set_constraints_in_chunks(self._executor)
+            return
+        for constr in self._model_instance.constraints:
+            self.model += self._constraint_to_amplify(constr)
+
+    def _set_constraints_in_chunks(self, executor: Executor):
+        constraints = self._model_instance.constraints
+        starts = range(0, len(constraints), CONSTRAINT_CHUNK_SIZE)
+        chunks = (
+            [
+                constr.to_bytes()
+                for constr in constraints[start : start + CONSTRAINT_CHUNK_SIZE]
+            ]
+            for start in starts
+        )
+        for start, terms in zip(starts, executor.map(_constraint_terms, chunks)):
+            chunk = constraints[start : start + CONSTRAINT_CHUNK_SIZE]
+            for constr, poly in zip(chunk, self._terms_to_polys(terms)):
+                if poly is None:
+                    self.model += self._constraint_to_amplify(constr)
+                else:
+                    self.model += self._make_constraint(
+                        constr.equality, _make_constraint_label(constr), poly
+                    )
+
+    def _set_constraints_from_bytes(self, data: bytes) -> bool:
+        """
+        Build the constraints from the serialized instance. Returns `False`, and builds
+        nothing, if the constraints of the instance are no longer the serialized ones.
+        """
+        from ommx.v1 import constraint_pb2, instance_pb2
+
+        equalities = {
+            constraint_pb2.EQUALITY_EQUAL_TO_ZERO: Constraint.EQUAL_TO_ZERO,
+            constraint_pb2.EQUALITY_LESS_THAN_OR_EQUAL_TO_ZERO: Constraint.LESS_THAN_OR_EQUAL_TO_ZERO,
+        }
+        constraints = list(instance_pb2.Instance.FromString(data).constraints)
+        # Keep the order of `Instance.constraints`.
+        constraints.sort(key=lambda constr: constr.id)
+        if [constr.id for constr in constraints] != [
+            constr.id for constr in self._model_instance.raw.constraints
+        ]:
+            return False
+        for start in range(0, len(constraints), CONSTRAINT_CHUNK_SIZE):
+            chunk = constraints[start : start + CONSTRAINT_CHUNK_SIZE]
+            polys = self._terms_to_polys(_serialized_constraint_terms(chunk))
+            for constr, poly in zip(chunk, polys):
+                if poly is None:
+                    self.model += self._constraint_to_amplify(
+                        self._model_instance.get_constraint_by_id(constr.id)
+                    )
+                else:
+                    self.model += self._make_constraint(
+                        equalities.get(constr.equality, constr.equality),
+                        _serialized_constraint_label(constr),
+                        poly,
+                    )
+        return True
+
+    def _terms_to_polys(
+        self, terms: "_ConstraintTerms"
+    ) -> Iterator[amplify.Poly | None]:
+        """
+        Build the polynomials of a chunk of constraints from their terms, or `None`
+        for the constraints of degree > 2.
+        """
+        variables = self._variable_list()
+        linear_positions = self._variable_positions(terms.linear_ids)
+        quadratic_positions = self._variable_positions(
+            terms.quadratic_ids.reshape(-1)
+        ).reshape(-1, 2)
+        # Python lists of the whole chunk for the constraints built term by term.
+        linear_list = linear_positions.tolist()
+        linear_values = terms.linear_values.tolist()
+        quadratic_list = quadratic_positions.tolist()
+        quadratic_values = terms.quadratic_values.tolist()
+        linear_offsets = terms.linear_offsets.tolist()
+        quadratic_offsets = terms.quadratic_offsets.tolist()
+        for i, constant in enumerate(terms.constants.tolist()):
+            if terms.high_order[i]:
+                yield None
+                continue
+
+            linear_begin, linear_end = linear_offsets[i], linear_offsets[i + 1]
+            quadratic_begin, quadratic_end = (
+                quadratic_offsets[i],
+                quadratic_offsets[i + 1],
+            )
+            num_linear = linear_end - linear_begin
+            num_quadratic = quadratic_end - quadratic_begin
+            poly = amplify.Poly(constant)
+            if num_linear + num_quadratic < BULK_POLY_MIN_TERMS:
+                for position, value in zip(
+                    linear_list[linear_begin:linear_end],
+                    linear_values[linear_begin:linear_end],
+                ):
+                    poly += value * variables[position]
+                for (first, second), value in zip(
+                    quadratic_list[quadratic_begin:quadratic_end],
+                    quadratic_values[quadratic_begin:quadratic_end],
+                ):
+                    poly += value * variables[first] * variables[second]
             else:
-                raise OMMXFixstarsAmplifyAdapterError(
-                    f"Unknown equality type: {constr.equality}"
-                )
+                if num_linear > 0:
+                    poly += _einsum_poly(
+                        "i,i->",
+                        terms.linear_values[linear_begin:linear_end],
+                        self._variable_array.take(linear_list[linear_begin:linear_end]),
+                    )
+                if num_quadratic > 0:
+                    positions = quadratic_positions[quadratic_begin:quadratic_end]
+                    poly += _einsum_poly(
+                        "i,i,i->",
+                        terms.quadratic_values[quadratic_begin:quadratic_end],
+                        self._variable_array.take(positions[:, 0].tolist()),
+                        self._variable_array.take(positions[:, 1].tolist()),
+                    )
+            self.stats.add_function(
+                int(num_linear + num_quadratic + (constant != 0)),
+                2 if num_quadratic > 0 else 1 if num_linear > 0 else 0,
+            )
+            yield poly
+
+    def _constraint_to_amplify(self, constr: Constraint) -> amplify.Constraint:
+        return self._make_constraint(
+            constr.equality,
+            _make_constraint_label(constr),
+            self._function_to_poly(constr.function),
+        )
+
+    def _make_constraint(
+        self, equality: typing.Any, label: str, function_poly: amplify.Poly
+    ) -> amplify.Constraint:
+        if equality == Constraint.EQUAL_TO_ZERO:
+            return amplify.equal_to(function_poly, 0, label=label)
+        elif equality == Constraint.LESS_THAN_OR_EQUAL_TO_ZERO:
+            return amplify.less_equal(function_poly, 0, label=label)
+        else:
+            raise OMMXFixstarsAmplifyAdapterError(f"Unknown equality type: {equality}")
 
     def _function_to_poly(
         self,
         func: Function,
     ) -> amplify.Poly:
+        degree = func.degree()
+        if degree > 2:
+            func = self._reduce_binary_power(func)
+            degree = func.degree()
+        num_terms = func.num_terms()
+        self.stats.add_function(num_terms, degree)
+        if degree <= 2 and num_terms >= BULK_POLY_MIN_TERMS:
+            return self._quadratic_to_poly(func)
+        return self._polynomial_to_poly(func)
+
+    def _reduce_binary_power(self, func: Function) -> Function:
+        """
+        Canonicalise a function of degree > 2 before it is converted: powers of binary
+        variables are collapsed (x^n = x) and the terms that become equal are merged.
+        The drop of the number of terms and of the degree is counted in :attr:`stats`.
+
+        The terms of OMMX functions are already merged and sorted, and amplify reduces
+        binary squares by itself, so functions of degree <= 2 are left as they are: only
+        higher degrees change the conversion, e.g. x * x * y becomes quadratic and can be
+        built in bulk.
+        """
+        degree = func.degree()
+        if degree <= 2 or not self._binary_ids:
+            return func
+        binary_ids = self._binary_ids.intersection(func.used_decision_variable_ids())
+        num_terms = func.num_terms()
+        # The function is a copy owned by the caller, so it is reduced in place.
+        if binary_ids and func.reduce_binary_power(set(binary_ids)):
+            self.stats.reduced_terms += num_terms - func.num_terms()
+            self.stats.reduced_degree = max(
+                self.stats.reduced_degree, degree - func.degree()
+            )
+        return func
+
+    def _quadratic_to_poly(self, func: Function) -> amplify.Poly:
+        """
+        Build the polynomial of a function with degree <= 2 in bulk, from the
+        coefficient and index arrays of its linear and quadratic parts. Used for
+        functions with at least :data:`BULK_POLY_MIN_TERMS` terms.
+        """
+        poly = amplify.Poly(func.constant_term)
+
+        ids, values = _linear_arrays(func.linear_terms)
+        if len(values) > 0:
+            poly += _einsum_poly("i,i->", values, self._take_variables(ids))
+
+        ids, values = _quadratic_arrays(func.quadratic_terms)
+        if len(values) > 0:
+            poly += _einsum_poly(
+                "i,i,i->",
+                values,
+                self._take_variables(ids[:, 0]),
+                self._take_variables(ids[:, 1]),
+            )
+
+        return poly
+
+    def _polynomial_to_poly(self, func: Function) -> amplify.Poly:
+        """
+        Build the polynomial term by term. Used for functions with degree > 2 and for
+        small functions, for which the fixed cost of `amplify.einsum` dominates.
+        """
+        variables = self._variable_list()
+        variable_index = self.variable_index
         poly = amplify.Poly(0)
         for ids, coefficient in func.terms.items():
             if len(ids) == 0:
@@ -230,15 +1274,273 @@ class OMMXFixstarsAmplifyAdapter(SolverAdapter):
             else:
                 term = coefficient
                 for id in ids:
-                    term *= self.variable_map[id]
+                    term *= variables[variable_index[id]]
                 poly += term
         return poly
 
+    def _variable_list(self) -> list[amplify.Poly]:
+        """
+        The amplify variables in the order of `_variable_array`, taken out of the array
+        once per build for the term by term conversions.
+        """
+        if self._variables is None:
+            self._variables = self._variable_array.to_list()
+        return self._variables
+
+    def _take_variables(self, ids: np.ndarray) -> amplify.PolyArray:
+        """
+        Gather the amplify variables corresponding to the given OMMX ids.
+        """
+        return self._variable_array.take(self._variable_positions(ids).tolist())
+
+    def _variable_positions(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Positions in `_variable_array` of the given OMMX ids.
+        """
+        positions = np.searchsorted(self._sorted_ids, ids)
+        found = positions < len(self._sorted_ids)
+        found[found] = self._sorted_ids[positions[found]] == ids[found]
+        if not np.all(found):
+            raise OMMXFixstarsAmplifyAdapterError(
+                f"Unknown decision variable id: {ids[~found][0]}"
+            )
+        return self._sorted_positions[positions]
+
+
+class _VariableMap(Mapping[int, amplify.Poly]):
+    """
+    Read-only mapping from OMMX decision variable ids to amplify variables.
+
+    Only the id to position map is held; the scalar polynomials are taken out of
+    the variable array on access.
+    """
+
+    def __init__(self, index: dict[int, int], array: amplify.PolyArray):
+        self._index = index
+        self._array = array
+
+    def __getitem__(self, id: int) -> amplify.Poly:
+        return self._array[self._index[id]]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+@dataclass
+class _ConstraintTerms:
+    """
+    Coefficients of a chunk of constraints of degree <= 2, concatenated over the
+    constraints. The terms of the i-th constraint are `[offsets[i], offsets[i + 1])`.
+    Constraints of higher degree have `high_order` set and no terms.
+    """
+
+    constants: np.ndarray
+    high_order: np.ndarray
+    linear_ids: np.ndarray
+    linear_values: np.ndarray
+    linear_offsets: np.ndarray
+    quadratic_ids: np.ndarray
+    quadratic_values: np.ndarray
+    quadratic_offsets: np.ndarray
+
+
+def _constraint_terms(data: list[bytes]) -> _ConstraintTerms:
+    """
+    Extract the terms of serialized ommx.v1.Constraint. Runs in the workers of
+    `OMMXFixstarsAmplifyAdapter(executor=...)`, so only picklable values are exchanged.
+    """
+    constants = np.zeros(len(data))
+    high_order = np.zeros(len(data), dtype=bool)
+    linear = []
+    quadratic = []
+    for i, constr_bytes in enumerate(data):
+        func = Constraint.from_bytes(constr_bytes).function
+        if func.degree() > 2:
+            high_order[i] = True
+            linear.append(_linear_arrays({}))
+            quadratic.append(_quadratic_arrays({}))
+            continue
+        constants[i] = func.constant_term
+        linear.append(_linear_arrays(func.linear_terms))
+        quadratic.append(_quadratic_arrays(func.quadratic_terms))
+
+    def concatenate(arrays, empty_ids):
+        ids = np.concatenate([empty_ids] + [ids for ids, _ in arrays])
+        values = np.concatenate([np.zeros(0)] + [values for _, values in arrays])
+        offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+        np.cumsum([len(values) for _, values in arrays], out=offsets[1:])
+        return ids, values, offsets
+
+    linear_ids, linear_values, linear_offsets = concatenate(
+        linear, np.zeros(0, dtype=np.uint64)
+    )
+    quadratic_ids, quadratic_values, quadratic_offsets = concatenate(
+        quadratic, np.zeros((0, 2), dtype=np.uint64)
+    )
+    return _ConstraintTerms(
+        constants=constants,
+        high_order=high_order,
+        linear_ids=linear_ids,
+        linear_values=linear_values,
+        linear_offsets=linear_offsets,
+        quadratic_ids=quadratic_ids,
+        quadratic_values=quadratic_values,
+        quadratic_offsets=quadratic_offsets,
+    )
+
+
+def _serialized_constraint_terms(constraints: list[typing.Any]) -> _ConstraintTerms:
+    """
+    Extract the terms of ommx.v1.Constraint protobuf messages, reading the
+    coefficients of the functions directly. Polynomial functions are marked as
+    `high_order`, whatever their degree.
+    """
+    constants = np.zeros(len(constraints))
+    high_order = np.zeros(len(constraints), dtype=bool)
+    linear_ids: list[int] = []
+    linear_values: list[float] = []
+    linear_offsets = np.zeros(len(constraints) + 1, dtype=np.int64)
+    rows: list[int] = []
+    columns: list[int] = []
+    quadratic_values: list[float] = []
+    quadratic_offsets = np.zeros(len(constraints) + 1, dtype=np.int64)
+    for i, constr in enumerate(constraints):
+        func = constr.function
+        kind = func.WhichOneof("function")
+        linear = None
+        if kind == "constant":
+            constants[i] = func.constant
+        elif kind == "linear":
+            linear = func.linear
+        elif kind == "quadratic":
+            quadratic = func.quadratic
+            rows.extend(quadratic.rows)
+            columns.extend(quadratic.columns)
+            quadratic_values.extend(quadratic.values)
+            if quadratic.HasField("linear"):
+                linear = quadratic.linear
+        elif kind == "polynomial":
+            high_order[i] = True
+        if linear is not None:
+            constants[i] = linear.constant
+            for term in linear.terms:
+                linear_ids.append(term.id)
+                linear_values.append(term.coefficient)
+        linear_offsets[i + 1] = len(linear_values)
+        quadratic_offsets[i + 1] = len(quadratic_values)
+
+    return _ConstraintTerms(
+        constants=constants,
+        high_order=high_order,
+        linear_ids=np.array(linear_ids, dtype=np.uint64),
+        linear_values=np.array(linear_values, dtype=np.float64),
+        linear_offsets=linear_offsets,
+        quadratic_ids=np.array([rows, columns], dtype=np.uint64).T.reshape(-1, 2),
+        quadratic_values=np.array(quadratic_values, dtype=np.float64),
+        quadratic_offsets=quadratic_offsets,
+    )
+
+
+def _best_solution(data: amplify.Result, target: str) -> typing.Any:
+    """
+    The best solution of `data`, or the best infeasible one if Amplify found no
+    feasible solution. `target` names what is decoded in the error message.
+    """
+    try:
+        return data.best
+    except RuntimeError:
+        pass
+    filter_solution = data.filter_solution
+    data.filter_solution = False
+    try:
+        return data.best
+    except RuntimeError as e:
+        raise OMMXFixstarsAmplifyAdapterError(f"Failed to create {target}: {str(e)}")
+    finally:
+        data.filter_solution = filter_solution
+
+
+def _variable_type(
+    variable: DecisionVariable,
+) -> tuple[amplify.VariableType, tuple[float | None, float | None]]:
+    """
+    The amplify variable type and bounds corresponding to an OMMX decision variable.
+    """
+    kind = variable.kind
+    if kind == DecisionVariable.BINARY:
+        return amplify.VariableType.Binary, (None, None)
+    elif kind == DecisionVariable.INTEGER:
+        bound = variable.bound
+        return amplify.VariableType.Integer, (bound.lower, bound.upper)
+    elif kind == DecisionVariable.CONTINUOUS:
+        bound = variable.bound
+        return amplify.VariableType.Real, (bound.lower, bound.upper)
+    else:
+        raise OMMXFixstarsAmplifyAdapterError(
+            f"Not supported decision variable kind: {kind}"
+        )
+
+
+def _amplify_ae_client(amplify_token: str, timeout: int) -> amplify.AmplifyAEClient:
+    if amplify_token == "":
+        raise OMMXFixstarsAmplifyAdapterError(
+            "No Fixstars Amplify token specificed -- cannot instantiate client"
+        )
+
+    client = amplify.AmplifyAEClient()
+    client.token = amplify_token
+    client.parameters.time_limit_ms = timeout
+    return client
+
+
+def _decision_variables_bytes(instance: Instance) -> list[bytes]:
+    return [var.to_bytes() for var in instance.used_decision_variables]
+
+
+def _einsum_poly(subscripts: str, *operands) -> amplify.Poly:
+    """
+    `amplify.einsum` with a scalar output, which is an `amplify.Poly`.
+    """
+    return typing.cast(amplify.Poly, amplify.einsum(subscripts, *operands))
+
+
+def _linear_arrays(terms: dict[int, float]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Split linear terms into an array of ids and an array of coefficients.
+    """
+    ids = np.fromiter(terms.keys(), dtype=np.uint64, count=len(terms))
+    values = np.fromiter(terms.values(), dtype=np.float64, count=len(terms))
+    return ids, values
+
+
+def _quadratic_arrays(
+    terms: dict[tuple[int, int], float],
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Split quadratic terms into an (n, 2) array of ids and an array of coefficients.
+    """
+    ids = np.fromiter(
+        (id for key in terms for id in key), dtype=np.uint64, count=2 * len(terms)
+    ).reshape(-1, 2)
+    values = np.fromiter(terms.values(), dtype=np.float64, count=len(terms))
+    return ids, values
+
 
 def _make_constraint_label(constraint: Constraint) -> str:
     return f"{constraint.name} [id: {constraint.id}]"
 
 
+def _serialized_constraint_label(constraint: typing.Any) -> str:
+    """
+    :func:`_make_constraint_label` of an ommx.v1.Constraint protobuf message.
+    """
+    name = constraint.name if constraint.HasField("name") else None
+    return f"{name} [id: {constraint.id}]"
+
+
 def _make_variable_label(variable: DecisionVariable) -> str:
     if len(variable.subscripts) == 0:
         return variable.name
@@ -1,7 +1,9 @@
+import itertools
 import typing
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import amplify
+import numpy as np
 from ommx.v1 import (
     Constraint,
     DecisionVariable,
@@ -13,6 +15,13 @@ from ommx.v1 import (
 )
 
 from .exception import OMMXFixstarsAmplifyAdapterError
+from .stats import ConversionStats, StatsSink
+
+STREAM_CHUNK_SIZE = 4096
+"""
+Default number of decision variables or constraints converted at a time by the
+streaming methods of :class:`OMMXInstanceBuilder`.
+"""
 
 
 @dataclass
@@ -22,58 +31,83 @@ class OMMXInstanceBuilder:
     """
 
     model: amplify.Model
+    stats: ConversionStats = field(default_factory=ConversionStats)
 
     def decision_variables(self) -> typing.List[DecisionVariable]:
-        decision_variables = []
-
-        for var in self.model.variables:
-            # TODO: How to deal with the case where the variable is an ising variable.
-            if var.type == amplify.VariableType.Binary:
-                kind = DecisionVariable.BINARY
-                lower = 0
-                upper = 1
-            elif var.type == amplify.VariableType.Integer:
-                kind = DecisionVariable.INTEGER
-                lower = float("-inf") if var.lower_bound is None else var.lower_bound
-                upper = float("inf") if var.upper_bound is None else var.upper_bound
-            elif var.type == amplify.VariableType.Real:
-                kind = DecisionVariable.CONTINUOUS
-                lower = float("-inf") if var.lower_bound is None else var.lower_bound
-                upper = float("inf") if var.upper_bound is None else var.upper_bound
-            elif var.type == amplify.VariableType.Ising:
-                raise OMMXFixstarsAmplifyAdapterError(
-                    "Ising variable is not supported now. Please use the Binary variable."
-                )
-            else:
-                raise OMMXFixstarsAmplifyAdapterError(
-                    f"Unintended variable type: {var.type}"
-                )
+        return [var for chunk in self.iter_decision_variables() for var in chunk]
 
-            decision_variables.append(
-                DecisionVariable.of_type(
-                    kind=kind,
-                    id=var.id,
-                    lower=lower,
-                    upper=upper,
-                    name=var.name,
-                )
+    def iter_decision_variables(
+        self, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> typing.Iterator[typing.List[DecisionVariable]]:
+        """
+        The decision variables, in lists of at most `chunk_size`.
+        """
+        return _chunked(map(self._decision_variable, self.model.variables), chunk_size)
+
+    def _decision_variable(self, var: amplify.Variable) -> DecisionVariable:
+        # TODO: How to deal with the case where the variable is an ising variable.
+        if var.type == amplify.VariableType.Binary:
+            kind = DecisionVariable.BINARY
+            lower = 0
+            upper = 1
+        elif var.type == amplify.VariableType.Integer:
+            kind = DecisionVariable.INTEGER
+            lower = float("-inf") if var.lower_bound is None else var.lower_bound
+            upper = float("inf") if var.upper_bound is None else var.upper_bound
+        elif var.type == amplify.VariableType.Real:
+            kind = DecisionVariable.CONTINUOUS
+            lower = float("-inf") if var.lower_bound is None else var.lower_bound
+            upper = float("inf") if var.upper_bound is None else var.upper_bound
+        elif var.type == amplify.VariableType.Ising:
+            raise OMMXFixstarsAmplifyAdapterError(
+                "Ising variable is not supported now. Please use the Binary variable."
+            )
+        else:
+            raise OMMXFixstarsAmplifyAdapterError(
+                f"Unintended variable type: {var.type}"
             )
 
-        return decision_variables
+        return DecisionVariable.of_type(
+            kind=kind,
+            id=var.id,
+            lower=lower,
+            upper=upper,
+            name=var.name,
+        )
 
-    def _poly_to_ommx(self, poly: amplify.Poly, constant: float = 0.0) -> Function:
+    def _poly_to_ommx(
+        self, poly: amplify.Poly, constant: float = 0.0, sign: float = 1.0
+    ) -> Function:
         """
         Convert from the polynomial of the Fixstars Amplify SDK to the object of ommx.v1.
+
+        The result is `sign * (poly - constant)`, so that a negated constraint does not
+        need a negated copy of the polynomial.
         """
-        poly_dict = poly.as_dict()
-        if poly.degree() <= 0:
-            return Function(poly_dict.pop((), 0.0) - constant)
-        elif poly.degree() == 1:
-            constant = poly_dict.pop((), 0.0) - constant
-            terms = {key[0]: value for key, value in poly_dict.items()}
+        return self._terms_to_ommx(poly.as_dict(), poly.degree(), constant, sign)
+
+    def _terms_to_ommx(
+        self,
+        poly_dict: typing.Dict[typing.Tuple[int, ...], float],
+        degree: int,
+        constant: float = 0.0,
+        sign: float = 1.0,
+    ) -> Function:
+        """
+        Convert the terms given by `amplify.Poly.as_dict` to `sign * (poly - constant)`.
+
+        `poly_dict` is not modified, so the same terms can be converted more than once.
+        """
+        constant = sign * (poly_dict.get((), 0.0) - constant)
+        self.stats.add_function(
+            len(poly_dict) - (() in poly_dict) + (constant != 0.0), max(degree, 0)
+        )
+        if degree <= 0:
+            return Function(constant)
+        elif degree == 1:
+            terms = {key[0]: sign * value for key, value in poly_dict.items() if key}
             return Function(Linear(terms=terms, constant=constant))
-        elif poly.degree() == 2:
-            constant = poly_dict.pop((), 0.0) - constant
+        elif degree == 2:
             columns = []
             rows = []
             values = []
@@ -82,9 +116,9 @@ class OMMXInstanceBuilder:
                 if len(key) == 2:
                     columns.append(key[0])
                     rows.append(key[1])
-                    values.append(value)
+                    values.append(sign * value)
                 elif len(key) == 1:
-                    terms[key[0]] = value
+                    terms[key[0]] = sign * value
             return Function(
                 Quadratic(
                     columns=columns,
@@ -94,102 +128,114 @@ class OMMXInstanceBuilder:
                 )
             )
         else:
-            constant = poly_dict.pop((), 0.0) - constant
-            terms = {}
-            for key, value in poly_dict.items():
-                terms[key] = value
-            terms[()] = constant
-            return Function(Polynomial(terms=terms))
+            poly_terms: typing.Dict[typing.Sequence[int], float] = {
+                key: sign * value for key, value in poly_dict.items() if key
+            }
+            poly_terms[()] = constant
+            return Function(Polynomial(terms=poly_terms))
+
+    def _matrix_to_ommx(self, matrix: amplify.Matrix) -> Function:
+        """
+        Convert from the coefficient-matrix form of the Fixstars Amplify SDK to the object of ommx.v1,
+        reading the coefficient arrays directly instead of expanding the matrix into a polynomial.
+        """
+        ids, quadratic, linear, constant = _matrix_arrays(matrix)
+        columns, rows = np.nonzero(quadratic)
+        nonzero = np.flatnonzero(linear)
+        self.stats.add_function(
+            len(columns) + len(nonzero) + (constant != 0.0),
+            2 if len(columns) > 0 else 1 if len(nonzero) > 0 else 0,
+        )
+        return Function(
+            Quadratic(
+                columns=ids[columns].tolist(),
+                rows=ids[rows].tolist(),
+                values=quadratic[columns, rows].tolist(),
+                linear=Linear(
+                    terms=dict(zip(ids[nonzero].tolist(), linear[nonzero].tolist())),
+                    constant=constant,
+                ),
+            )
+        )
 
     def objective(self) -> Function:
         if isinstance(self.model.objective, amplify.Matrix):
-            objective = self.model.objective.to_poly()
-        else:
-            objective = self.model.objective
-        return self._poly_to_ommx(objective)
+            return self._matrix_to_ommx(self.model.objective)
+        return self._poly_to_ommx(self.model.objective)
 
     def constraints(self) -> typing.List[Constraint]:
-        constraints = []
+        return [constr for chunk in self.iter_constraints() for constr in chunk]
+
+    def iter_constraints(
+        self, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> typing.Iterator[typing.List[Constraint]]:
+        """
+        The constraints, in lists of at most `chunk_size`. Each `amplify.clamp`
+        constraint is split into two constraints.
+        """
+        return _chunked(self._constraints(), chunk_size)
+
+    def _constraints(self) -> typing.Iterator[Constraint]:
         counter = -1
         for constraint in self.model.constraints:
             counter += 1
+            # NOTE: `conditional` copies the polynomial on every access, so read it once.
+            poly, condition, bound = constraint.conditional
             # Case: `amplify.less_than`
-            if constraint.conditional[1] == "LE":
-                assert isinstance(constraint.conditional[2], float)
-                constraints.append(
-                    Constraint(
-                        id=counter,
-                        function=self._poly_to_ommx(
-                            constraint.conditional[0],
-                            constraint.conditional[2],
-                        ),
-                        equality=Constraint.LESS_THAN_OR_EQUAL_TO_ZERO,
-                        name=constraint.label,
-                    )
+            if condition == "LE":
+                assert isinstance(bound, float)
+                yield Constraint(
+                    id=counter,
+                    function=self._poly_to_ommx(poly, bound),
+                    equality=Constraint.LESS_THAN_OR_EQUAL_TO_ZERO,
+                    name=constraint.label,
                 )
             # Case: `amplify.equal_to`
-            elif constraint.conditional[1] == "EQ":
-                assert isinstance(constraint.conditional[2], float)
-                constraints.append(
-                    Constraint(
-                        id=counter,
-                        function=self._poly_to_ommx(
-                            constraint.conditional[0],
-                            constraint.conditional[2],
-                        ),
-                        equality=Constraint.EQUAL_TO_ZERO,
-                        name=constraint.label,
-                    )
+            elif condition == "EQ":
+                assert isinstance(bound, float)
+                yield Constraint(
+                    id=counter,
+                    function=self._poly_to_ommx(poly, bound),
+                    equality=Constraint.EQUAL_TO_ZERO,
+                    name=constraint.label,
                 )
             # Case: `amplify.greater_than`
-            elif constraint.conditional[1] == "GE":
-                assert isinstance(constraint.conditional[2], float)
+            elif condition == "GE":
+                assert isinstance(bound, float)
                 # Convert to `LESS_THAN_OR_EQUAL_TO_ZERO` constraint.
-                constraints.append(
-                    Constraint(
-                        id=counter,
-                        function=self._poly_to_ommx(
-                            -1 * constraint.conditional[0],
-                            -1 * constraint.conditional[2],
-                        ),
-                        equality=Constraint.LESS_THAN_OR_EQUAL_TO_ZERO,
-                        name=constraint.label,
-                    )
+                yield Constraint(
+                    id=counter,
+                    function=self._poly_to_ommx(poly, bound, sign=-1.0),
+                    equality=Constraint.LESS_THAN_OR_EQUAL_TO_ZERO,
+                    name=constraint.label,
                 )
             # Case: `amplify.clamp`
-            elif constraint.conditional[1] == "BW":
-                assert isinstance(constraint.conditional[2], tuple)
-                # Split into two `LESS_THAN_OR_EQUAL_TO_ZERO` constraints.
-                constraints.append(
-                    Constraint(
-                        id=counter,
-                        function=self._poly_to_ommx(
-                            -1 * constraint.conditional[0],
-                            -1 * constraint.conditional[2][0],
-                        ),
-                        equality=Constraint.LESS_THAN_OR_EQUAL_TO_ZERO,
-                        name=constraint.label + "_lower",
-                    )
+            elif condition == "BW":
+                assert isinstance(bound, tuple)
+                # Split into two `LESS_THAN_OR_EQUAL_TO_ZERO` constraints,
+                # sharing the terms of the polynomial.
+                poly_dict = poly.as_dict()
+                degree = poly.degree()
+                yield Constraint(
+                    id=counter,
+                    function=self._terms_to_ommx(
+                        poly_dict, degree, bound[0], sign=-1.0
+                    ),
+                    equality=Constraint.LESS_THAN_OR_EQUAL_TO_ZERO,
+                    name=constraint.label + "_lower",
                 )
                 counter += 1
-                constraints.append(
-                    Constraint(
-                        id=counter,
-                        function=self._poly_to_ommx(
-                            constraint.conditional[0],
-                            constraint.conditional[2][1],
-                        ),
-                        equality=Constraint.LESS_THAN_OR_EQUAL_TO_ZERO,
-                        name=constraint.label + "_upper",
-                    )
+                yield Constraint(
+                    id=counter,
+                    function=self._terms_to_ommx(poly_dict, degree, bound[1]),
+                    equality=Constraint.LESS_THAN_OR_EQUAL_TO_ZERO,
+                    name=constraint.label + "_upper",
                 )
             else:
                 raise OMMXFixstarsAmplifyAdapterError(
-                    f"Unintended constraint type: {constraint.conditional[1]}"
+                    f"Unintended constraint type: {condition}"
                 )
 
-        return constraints
-
     def sense(self):
         # NOTE:
         # According to the following link, the Fixstars Amplify SDK only supports
@@ -202,13 +248,16 @@ class OMMXInstanceBuilder:
         # A segment fault occurs when accessing the variables method of
         # the amplify.Model without decision variables.
         # So, without accessing this method, determine an empty mathematical model.
-        if isinstance(self.model.objective, amplify.Poly):
-            objective = self.model.objective
-        else:
-            objective = self.model.objective.to_poly()
-        return objective.degree() <= 0 and len(self.model.constraints) == 0
+        if len(self.model.constraints) > 0:
+            return False
+        if isinstance(self.model.objective, amplify.Matrix):
+            _, quadratic, linear, _ = _matrix_arrays(self.model.objective)
+            return not np.any(quadratic) and not np.any(linear)
+        return self.model.objective.degree() <= 0
 
     def build(self) -> Instance:
+        self.stats.num_terms = 0
+        self.stats.max_degree = 0
         if self._is_empty_model():
             # NOTE:
             # Note that even in the case of a non-zero constant objective function,
@@ -220,18 +269,128 @@ class OMMXInstanceBuilder:
                 sense=self.sense(),
             )
         else:
-            return Instance.from_components(
-                decision_variables=self.decision_variables(),
-                objective=self.objective(),
-                constraints=self.constraints(),
-                sense=self.sense(),
-            )
+            with self.stats.stage("decision_variables"):
+                decision_variables = self.decision_variables()
+                self.stats.num_variables = len(decision_variables)
+            with self.stats.stage("objective"):
+                objective = self.objective()
+            with self.stats.stage("constraints"):
+                constraints = self.constraints()
+                self.stats.num_constraints = len(constraints)
+            with self.stats.stage("instance"):
+                return Instance.from_components(
+                    decision_variables=decision_variables,
+                    objective=objective,
+                    constraints=constraints,
+                    sense=self.sense(),
+                )
 
+    def write(
+        self, stream: typing.BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> int:
+        """
+        Write the serialized ommx.v1.Instance to a binary stream, e.g. a file, without
+        holding all the decision variables and constraints at once: they are converted
+        and written `chunk_size` at a time, so memory use is proportional to the chunk
+        size rather than to the model. The stream contains the same instance as
+        :meth:`build`, to be loaded with `Instance.from_bytes`.
 
-def model_to_instance(model: amplify.Model) -> Instance:
+        Returns the number of bytes written.
+        """
+        from ommx.v1 import instance_pb2
+
+        self.stats.num_terms = 0
+        self.stats.max_degree = 0
+        self.stats.num_variables = 0
+        self.stats.num_constraints = 0
+        if self._is_empty_model():
+            objective = Function(0)
+        else:
+            with self.stats.stage("objective"):
+                objective = self.objective()
+        sense = self.sense()
+        if sense == Instance.MINIMIZE:
+            head = instance_pb2.Instance(sense=instance_pb2.Instance.SENSE_MINIMIZE)
+        elif sense == Instance.MAXIMIZE:
+            head = instance_pb2.Instance(sense=instance_pb2.Instance.SENSE_MAXIMIZE)
+        else:
+            raise OMMXFixstarsAmplifyAdapterError(f"Unknown sense: {sense}")
+        head.objective.MergeFromString(objective.to_bytes())
+        # Serialized messages concatenate into their merge, which appends the
+        # repeated fields, so each chunk is written as a partial instance.
+        written = stream.write(head.SerializeToString())
+        if self._is_empty_model():
+            return written
+
+        with self.stats.stage("decision_variables"):
+            for variables in self.iter_decision_variables(chunk_size):
+                chunk = instance_pb2.Instance()
+                for var in variables:
+                    chunk.decision_variables.add().MergeFromString(var.to_bytes())
+                written += stream.write(chunk.SerializeToString())
+                self.stats.num_variables += len(variables)
+        with self.stats.stage("constraints"):
+            for constraints in self.iter_constraints(chunk_size):
+                chunk = instance_pb2.Instance()
+                for constr in constraints:
+                    chunk.constraints.add().MergeFromString(constr.to_bytes())
+                written += stream.write(chunk.SerializeToString())
+                self.stats.num_constraints += len(constraints)
+        return written
+
+
+def _chunked(
+    items: typing.Iterable[typing.Any], chunk_size: int
+) -> typing.Iterator[typing.List[typing.Any]]:
+    if chunk_size < 1:
+        raise OMMXFixstarsAmplifyAdapterError(
+            f"Chunk size must be positive: {chunk_size}"
+        )
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, chunk_size)):
+        yield chunk
+
+
+def _matrix_arrays(
+    matrix: amplify.Matrix,
+) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    """
+    The variable ids, the (n, n) quadratic and (n,) linear coefficient arrays,
+    and the constant of an amplify.Matrix, with the variable array flattened.
+
+    The diagonal of the quadratic coefficients is folded the way `Matrix.to_poly`
+    does it: into the linear part for binary variables (x * x = x) and into the
+    constant for ising variables (s * s = 1).
+    """
+    variables = matrix.variable_array.flatten().to_list()
+    ids = np.array([poly.as_variable().id for poly in variables], dtype=np.uint64)
+    n = len(ids)
+    quadratic = np.array(matrix.quadratic, dtype=np.float64).reshape(n, n)
+    linear = np.array(matrix.linear, dtype=np.float64).reshape(n)
+    constant = float(matrix.constant)
+
+    if n > 0:
+        variable_type = variables[0].as_variable().type
+        if variable_type == amplify.VariableType.Binary:
+            linear += np.diagonal(quadratic)
+            np.fill_diagonal(quadratic, 0.0)
+        elif variable_type == amplify.VariableType.Ising:
+            constant += float(np.trace(quadratic))
+            np.fill_diagonal(quadratic, 0.0)
+
+    return ids, quadratic, linear, constant
+
+
+def model_to_instance(
+    model: amplify.Model, *, stats_sink: typing.Optional[StatsSink] = None
+) -> Instance:
     """
     The function to create an ommx.v1.Instance from the Fixstars Amplify model.
 
+    :param model: The amplify.Model to convert.
+    :param stats_sink: Called as each stage of the conversion completes, see
+        :class:`ConversionStats`. Use `OMMXInstanceBuilder` directly to keep the stats.
+
     Example:
     =========
     The following example shows how to create an ommx.v1.Instance from a Fixstars Amplify model.
@@ -248,5 +407,51 @@ def model_to_instance(model: amplify.Model) -> Instance:
         >>> ommx_instance = model_to_instance(model)
 
     """
-    builder = OMMXInstanceBuilder(model)
+    builder = OMMXInstanceBuilder(model, ConversionStats(sink=stats_sink))
     return builder.build()
+
+
+def write_instance(
+    model: amplify.Model,
+    stream: typing.BinaryIO,
+    *,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    stats_sink: typing.Optional[StatsSink] = None,
+) -> int:
+    """
+    Streaming version of :func:`model_to_instance`, writing the serialized
+    ommx.v1.Instance to a binary stream instead of creating it. See
+    :meth:`OMMXInstanceBuilder.write`.
+
+    :param model: The amplify.Model to convert.
+    :param stream: The binary stream to write to, e.g. a file opened with `"wb"`.
+    :param chunk_size: Number of decision variables or constraints converted at a time.
+    :param stats_sink: Called as each stage of the conversion completes, see
+        :class:`ConversionStats`.
+    :return: The number of bytes written.
+
+    Example:
+    =========
+
+    .. doctest::
+
+        >>> import io
+        >>> import amplify
+        >>> from ommx.v1 import Instance
+        >>> from ommx_fixstars_amplify_adapter import write_instance
+        >>>
+        >>> gen = amplify.VariableGenerator()
+        >>> x = gen.array("Binary", 3, name="x")
+        >>> model = amplify.Model(x.sum(), amplify.less_equal(x.sum(), 2))
+        >>>
+        >>> buffer = io.BytesIO()
+        >>> _ = write_instance(model, buffer, chunk_size=2)
+        >>> ommx_instance = Instance.from_bytes(buffer.getvalue())
+        >>> len(ommx_instance.decision_variables), len(ommx_instance.constraints)
+        (3, 1)
+
+    The bytes can be stored in an OMMX artifact with
+    `ArtifactBuilder.add_layer("application/org.ommx.v1.instance", blob)`.
+    """
+    builder = OMMXInstanceBuilder(model, ConversionStats(sink=stats_sink))
+    return builder.write(stream, chunk_size)
@@ -0,0 +1,320 @@
+import time
+import typing
+from dataclasses import dataclass
+from datetime import timedelta
+
+import amplify
+import numpy as np
+
+from .exception import OMMXFixstarsAmplifyAdapterError
+
+_BINARY_QUADRATIC = {"Binary": "Quadratic"}
+
+_MAX_DESCENT_SWEEPS = 100
+
+_CONSTRAINT_FUNCTIONS = {
+    "EQ": amplify.equal_to,
+    "LE": amplify.less_equal,
+    "GE": amplify.greater_equal,
+    "BW": amplify.clamp,
+}
+
+
+@dataclass
+class LocalAnnealingParameters:
+    """
+    Parameters of :class:`LocalAnnealingClient`.
+    """
+
+    num_sweeps: int = 1000
+    """Number of sweeps over all the variables in each read."""
+    num_reads: int = 10
+    """Number of independent reads, annealed together and each returned as a solution."""
+    beta_range: typing.Optional[typing.Tuple[float, float]] = None
+    """
+    Initial and final inverse temperatures of the geometric schedule. By default, the
+    largest energy change is accepted with probability 1/2 at the start, and the
+    smallest with probability 1/100 at the end.
+    """
+    penalty_weight: typing.Optional[float] = None
+    """
+    Multiplier of the constraint penalties, on top of the weight of each constraint.
+    Defaults to the largest absolute coefficient of the objective, or 1.
+    """
+    time_limit_ms: typing.Optional[int] = None
+    """Stop after the sweep during which this time limit is reached."""
+    seed: typing.Optional[int] = None
+    initial_values: typing.Optional[typing.Dict[int, float]] = None
+    """
+    Values to start every read from, keyed by the ids of the variables of the problem
+    received by the client, see :meth:`OMMXFixstarsAmplifyAdapter.initial_values`.
+    Other variables start at random. Set a `beta_range` starting colder than the
+    default to stay close to the initial values.
+    """
+
+
+class _CustomClientResult:
+    """
+    Result of a custom Amplify client: the given solutions, each the values of the
+    variables of the solved problem, with a common execution time.
+    """
+
+    def __init__(
+        self, solutions: typing.List[typing.List[float]], execution_time: timedelta
+    ):
+        self._values = solutions
+        self._time = execution_time
+
+    @property
+    def _solutions(self) -> typing.List[typing.Tuple[typing.List[float], timedelta]]:
+        return [(values, self._time) for values in self._values]
+
+    @property
+    def _response_time(self) -> timedelta:
+        return self._time
+
+    @property
+    def _execution_time(self) -> timedelta:
+        return self._time
+
+
+class LocalAnnealingClient:
+    """
+    Amplify client solving models on the local machine by simulated annealing,
+    without a network connection or a token.
+
+    The model is converted by Amplify to binary variables and quadratic polynomials,
+    and the constraints are added to the objective as penalties. The resulting QUBO is
+    annealed with single-variable Metropolis updates, vectorized with NumPy over the
+    reads. It is meant for tests, development and small problems, not as a replacement
+    for Fixstars Amplify AE.
+
+    Requires an amplify version supporting custom clients (`amplify.CustomClientProtocol`).
+
+    Example:
+    =========
+
+    .. doctest::
+
+        >>> from ommx_fixstars_amplify_adapter import (
+        ...     LocalAnnealingClient, OMMXFixstarsAmplifyAdapter
+        ... )
+        >>> from ommx.v1 import Instance, DecisionVariable
+        >>>
+        >>> x = [DecisionVariable.binary(i) for i in range(3)]
+        >>> ommx_instance = Instance.from_components(
+        ...     decision_variables=x,
+        ...     objective=x[0] + 2 * x[1] + 3 * x[2],
+        ...     constraints=[x[0] + x[1] + x[2] == 2],
+        ...     sense=Instance.MAXIMIZE,
+        ... )
+        >>> client = LocalAnnealingClient(num_sweeps=100, seed=0)
+        >>> solution = OMMXFixstarsAmplifyAdapter.solve(ommx_instance, client=client)
+        >>> solution.state.entries
+        {0: 0.0, 1: 1.0, 2: 1.0}
+    """
+
+    def __init__(self, **parameters: typing.Any):
+        """
+        :param parameters: Initial values of :class:`LocalAnnealingParameters`.
+        """
+        if not hasattr(amplify, "CustomClientProtocol"):
+            raise OMMXFixstarsAmplifyAdapterError(
+                "LocalAnnealingClient requires an amplify version supporting custom clients"
+            )
+        self.parameters = LocalAnnealingParameters(**parameters)
+
+    @property
+    def acceptable_degrees(self) -> amplify.AcceptableDegrees:
+        return amplify.AcceptableDegrees(
+            objective=_BINARY_QUADRATIC,  # type: ignore
+            equality_constraints=_BINARY_QUADRATIC,  # type: ignore
+            inequality_constraints=_BINARY_QUADRATIC,  # type: ignore
+        )
+
+    @property
+    def version(self) -> str:
+        return "local-annealing"
+
+    def solve(
+        self,
+        objective: amplify.Poly,
+        constraints: typing.Optional[amplify.ConstraintList],
+        dry_run: bool = False,
+    ) -> typing.Optional[_CustomClientResult]:
+        if dry_run:
+            return None
+        if constraints is None:
+            constraints = amplify.ConstraintList()
+        start = time.perf_counter()
+        variables = amplify.Model(objective, constraints).variables
+
+        penalty_weight = self.parameters.penalty_weight
+        if penalty_weight is None:
+            coefficients = [abs(c) for key, c in objective.as_dict().items() if key]
+            penalty_weight = max(coefficients, default=1.0)
+        # The constraints passed to a client carry no penalty, so they are recreated.
+        penalties = amplify.Model(
+            amplify.Poly(0), amplify.ConstraintList(map(_with_penalty, constraints))
+        ).to_unconstrained_poly()
+        # The penalties of inequalities introduce integer or real slack variables,
+        # which are encoded as binary variables here.
+        qubo, mapping = amplify.Model(
+            objective + penalty_weight * penalties
+        ).to_intermediate_model(amplify.AcceptableDegrees(objective=_BINARY_QUADRATIC))  # type: ignore
+        qubo_poly = qubo.to_unconstrained_poly()
+
+        positions = {var.id: k for k, var in enumerate(qubo_poly.variables)}
+        initial = np.full(len(positions), np.nan)
+        initial_values = self.parameters.initial_values or {}
+        for key, value in mapping.items():
+            (var,) = key.variables
+            terms = list(value.as_dict().items())
+            # The binary variables of the problem are kept as they are.
+            if var.id in initial_values and len(terms) == 1 and terms[0][1] == 1.0:
+                ((id,), _) = terms[0]
+                initial[positions[id]] = initial_values[var.id]
+        samples = _anneal(
+            _QUBO.from_poly(qubo_poly, positions), self.parameters, start, initial
+        )
+
+        # Values of the problem variables, from the binary variables encoding them.
+        values = np.zeros((len(variables), len(samples)))
+        index = {var.id: k for k, var in enumerate(variables)}
+        for key, value in mapping.items():
+            (var,) = key.variables
+            if var.id not in index:
+                continue
+            for ids, coefficient in value.as_dict().items():
+                term = np.full(len(samples), coefficient)
+                for id in ids:
+                    term *= samples[:, positions[id]]
+                values[index[var.id]] += term
+
+        return _CustomClientResult(
+            values.T.tolist(), timedelta(seconds=time.perf_counter() - start)
+        )
+
+
+def _with_penalty(constraint: amplify.Constraint) -> amplify.Constraint:
+    poly, op, bounds = constraint.conditional
+    result = _CONSTRAINT_FUNCTIONS[op](poly, bounds)
+    result.weight = constraint.weight
+    return result
+
+
+@dataclass
+class _QUBO:
+    """
+    Binary quadratic polynomial, with the quadratic coefficients of each variable in
+    compressed sparse row layout over both orderings of every pair.
+    """
+
+    linear: np.ndarray
+    indptr: np.ndarray
+    neighbors: np.ndarray
+    coefficients: np.ndarray
+
+    @classmethod
+    def from_poly(cls, poly: amplify.Poly, positions: dict[int, int]) -> "_QUBO":
+        linear = np.zeros(len(positions))
+        rows = []
+        columns = []
+        values = []
+        for ids, coefficient in poly.as_dict().items():
+            if len(ids) == 1 or (len(ids) == 2 and ids[0] == ids[1]):
+                linear[positions[ids[0]]] += coefficient
+            elif len(ids) == 2:
+                rows.append(positions[ids[0]])
+                columns.append(positions[ids[1]])
+                values.append(coefficient)
+        rows_array = np.array(rows + columns, dtype=np.int64)
+        order = np.argsort(rows_array, kind="stable")
+        indptr = np.zeros(len(positions) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows_array, minlength=len(positions)), out=indptr[1:])
+        return cls(
+            linear=linear,
+            indptr=indptr,
+            neighbors=np.array(columns + rows, dtype=np.int64)[order],
+            coefficients=np.array(values + values, dtype=np.float64)[order],
+        )
+
+    def beta_range(self) -> typing.Tuple[float, float]:
+        strength = np.abs(self.linear) + np.add.reduceat(
+            np.abs(np.append(self.coefficients, 0.0)), self.indptr[:-1]
+        ) * (np.diff(self.indptr) > 0)
+        magnitudes = np.abs(np.concatenate([self.linear, self.coefficients]))
+        magnitudes = magnitudes[magnitudes > 0]
+        if len(magnitudes) == 0:
+            return 1.0, 1.0
+        return np.log(2.0) / strength.max(), np.log(100.0) / magnitudes.min()
+
+
+def _anneal(
+    qubo: _QUBO,
+    parameters: LocalAnnealingParameters,
+    start: float,
+    initial: np.ndarray,
+) -> np.ndarray:
+    """
+    Samples of shape `(num_reads, num_variables)` annealed from the `initial` values,
+    or from uniformly random values where they are NaN.
+    """
+    rng = np.random.default_rng(parameters.seed)
+    num_variables = len(qubo.linear)
+    num_reads = parameters.num_reads
+    # States and local fields are stored per variable, so that the reads of one
+    # variable are contiguous.
+    state = rng.integers(0, 2, size=(num_variables, num_reads)).astype(np.float64)
+    known = ~np.isnan(initial)
+    state[known] = initial[known, None]
+    field = np.repeat(qubo.linear[:, None], num_reads, axis=1)
+    for i in range(num_variables):
+        begin, end = qubo.indptr[i], qubo.indptr[i + 1]
+        field[i] += qubo.coefficients[begin:end] @ state[qubo.neighbors[begin:end]]
+    if num_variables == 0:
+        return state.T
+
+    beta_start, beta_end = parameters.beta_range or qubo.beta_range()
+    deadline = (
+        None
+        if parameters.time_limit_ms is None
+        else start + parameters.time_limit_ms / 1000
+    )
+    ratio = (beta_end / beta_start) ** (1 / max(parameters.num_sweeps - 1, 1))
+    for sweep in range(parameters.num_sweeps):
+        beta = beta_start * ratio**sweep
+        # A flip raising the energy by `de` is accepted if `de < -log(u) / beta`.
+        _sweep(qubo, state, field, -np.log(rng.random(state.shape)) / beta)
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+
+    # Descend to a local minimum of every read, taking only improving flips.
+    zeros = np.zeros_like(state)
+    for _ in range(_MAX_DESCENT_SWEEPS):
+        if not _sweep(qubo, state, field, zeros):
+            break
+    return state.T
+
+
+def _sweep(
+    qubo: _QUBO, state: np.ndarray, field: np.ndarray, thresholds: np.ndarray
+) -> bool:
+    """
+    Flip each variable in turn in the reads where the energy change is below the
+    threshold, updating the local fields. Returns whether any variable was flipped.
+    """
+    flipped = False
+    for i in range(len(state)):
+        delta = 1.0 - 2.0 * state[i]
+        flip = delta * field[i] < thresholds[i]
+        if not flip.any():
+            continue
+        flipped = True
+        delta *= flip
+        state[i] += delta
+        begin, end = qubo.indptr[i], qubo.indptr[i + 1]
+        field[qubo.neighbors[begin:end]] += (
+            qubo.coefficients[begin:end, None] * delta[None, :]
+        )
+    return flipped
@@ -0,0 +1,373 @@
+import hashlib
+import os
+import pathlib
+import tempfile
+import threading
+import time
+import typing
+from collections import OrderedDict
+from dataclasses import dataclass
+
+if typing.TYPE_CHECKING:
+    from ommx.v1 import Instance, Solution, State
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """
+    Counters of a cache, taken at one point in time.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+
+
+class _LRUCache:
+    """
+    In-memory LRU cache of values with an estimated size, optionally expiring.
+    """
+
+    def __init__(self, max_bytes: int, ttl: typing.Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # Each entry is (value, size in bytes, expiry time or None).
+        self._entries: OrderedDict[
+            str, typing.Tuple[typing.Any, int, typing.Optional[float]]
+        ] = OrderedDict()
+        self._size_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> typing.Any:
+        """
+        Return the entry stored under `key`, or `None` if there is none.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and entry[2] is not None
+                and entry[2] <= time.monotonic()
+            ):
+                self._size_bytes -= self._entries.pop(key)[1]
+                self._evictions += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: typing.Any, size_bytes: int):
+        """
+        Store `value` under `key`. A value larger than the whole budget is not stored.
+        """
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if key in self._entries:
+                self._size_bytes -= self._entries.pop(key)[1]
+            if size_bytes > self.max_bytes:
+                return
+            self._entries[key] = (value, size_bytes, expires)
+            self._size_bytes += size_bytes
+            while self._size_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._size_bytes -= evicted_size
+                self._evictions += 1
+
+    def clear(self):
+        """
+        Remove all the entries. The counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                size_bytes=self._size_bytes,
+            )
+
+
+class ModelCache(_LRUCache):
+    """
+    In-memory LRU cache of the amplify models built by OMMXFixstarsAmplifyAdapter,
+    keyed by :func:`instance_digest`.
+
+    The size of an entry is estimated by the serialized size of the instance parts
+    that went into its digest. When adding an entry would exceed `max_bytes`, the
+    least recently used entries are evicted. Entries are shared between threads.
+
+    The adapters created from an entry each get a copy of its model, but share the
+    entry's amplify variables, `variable_index` and `variable_map`. Amplify variables
+    belong to their generator rather than to a model, so renaming a variable, e.g.
+    with :meth:`OMMXFixstarsAmplifyAdapter.assign_variable_names`, renames it in the
+    models of all these adapters. Treat the shared parts as read-only.
+
+    There is no on-disk tier: an amplify.Model cannot be pickled, and the LP format
+    drops constraint labels and terms of degree above 2.
+
+    Example:
+    =========
+
+    .. doctest::
+
+        >>> from ommx_fixstars_amplify_adapter import ModelCache, OMMXFixstarsAmplifyAdapter
+        >>> from ommx.v1 import Instance, DecisionVariable
+        >>>
+        >>> x1 = DecisionVariable.integer(1, lower=0, upper=5)
+        >>> ommx_instance = Instance.from_components(
+        ...     decision_variables=[x1],
+        ...     objective=x1,
+        ...     constraints=[],
+        ...     sense=Instance.MINIMIZE,
+        ... )
+        >>> cache = ModelCache(max_bytes=1 << 20)
+        >>> for _ in range(2):
+        ...     adapter = OMMXFixstarsAmplifyAdapter(ommx_instance, model_cache=cache)
+        ...     model = adapter.solver_input
+        >>> cache.stats.hits, cache.stats.misses
+        (1, 1)
+    """
+
+    def __init__(self, max_bytes: int = 1 << 30):
+        """
+        :param max_bytes: Budget for the estimated size of all entries.
+        """
+        super().__init__(max_bytes)
+
+
+class SolutionCache:
+    """
+    Cache of the solutions returned by :meth:`OMMXFixstarsAmplifyAdapter.solve`, keyed
+    by :meth:`key`: a digest of the instance, the type of the client and its parameters.
+
+    The serialized solutions are kept in an in-memory LRU tier of up to `max_bytes`
+    and, if `directory` is given, in files in that directory of up to `max_disk_bytes`
+    in total, evicting the least recently used files. Entries older than `ttl`
+    seconds are not returned and are removed. A solution found on disk is promoted to
+    memory. Entries are shared between threads, and the directory between processes.
+
+    Only use a cache for clients whose results are meant to be reused, e.g. not when
+    solving repeatedly to get different solutions of a randomized solver.
+
+    Example:
+    =========
+
+    .. doctest::
+
+        >>> from ommx_fixstars_amplify_adapter import SolutionCache, OMMXFixstarsAmplifyAdapter
+        >>> from ommx.v1 import Instance, DecisionVariable
+        >>>
+        >>> x1 = DecisionVariable.integer(1, lower=0, upper=5)
+        >>> ommx_instance = Instance.from_components(
+        ...     decision_variables=[x1],
+        ...     objective=x1,
+        ...     constraints=[],
+        ...     sense=Instance.MINIMIZE,
+        ... )
+        >>> cache = SolutionCache(ttl=3600, directory=".solution-cache")  # doctest: +SKIP
+        >>> for _ in range(2):  # doctest: +SKIP
+        ...     solution = OMMXFixstarsAmplifyAdapter.solve(
+        ...         ommx_instance, amplify_token="YOUR API TOKEN", solution_cache=cache
+        ...     )
+        >>> cache.stats.hits, cache.stats.misses  # doctest: +SKIP
+        (1, 1)
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 1 << 28,
+        *,
+        ttl: typing.Optional[float] = None,
+        directory: typing.Union[str, "os.PathLike[str]", None] = None,
+        max_disk_bytes: int = 1 << 30,
+    ):
+        """
+        :param max_bytes: Budget for the serialized size of the solutions in memory.
+        :param ttl: Lifetime of an entry in seconds, or `None` for no expiry.
+        :param directory: Directory to store the solutions in, created if needed.
+        :param max_disk_bytes: Budget for the size of the files in `directory`.
+        """
+        self._memory = _LRUCache(max_bytes, ttl)
+        self.ttl = ttl
+        self.directory = None if directory is None else pathlib.Path(directory)
+        self.max_disk_bytes = max_disk_bytes
+        self._disk_hits = 0
+        self._disk_evictions = 0
+        self._lock = threading.Lock()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(
+        instance: "Instance",
+        client: typing.Any,
+        initial_state: typing.Optional["State"] = None,
+    ) -> str:
+        """
+        The key of the solution of `instance` with `client`, started from
+        `initial_state` if given. Clients of the same type with equal `repr` of their
+        `parameters` share keys; the token of a Fixstars Amplify AE Client is not part
+        of the key.
+        """
+        initial_values = (
+            None if initial_state is None else sorted(initial_state.entries.items())
+        )
+        return instance_digest(
+            instance, type(client).__qualname__, repr(client.parameters), initial_values
+        )
+
+    def get(self, key: str) -> typing.Optional["Solution"]:
+        """
+        Return the solution stored under `key`, or `None` if there is none.
+        """
+        from ommx.v1 import Solution
+
+        data = self._memory.get(key)
+        if data is None and self.directory is not None:
+            data = self._read(key)
+            if data is not None:
+                with self._lock:
+                    self._disk_hits += 1
+                self._memory.put(key, data, len(data))
+        return None if data is None else Solution.from_bytes(data)
+
+    def put(self, key: str, solution: "Solution"):
+        """
+        Store `solution` under `key`.
+        """
+        data = solution.to_bytes()
+        self._memory.put(key, data, len(data))
+        if self.directory is not None:
+            self._write(key, data)
+
+    def clear(self):
+        """
+        Remove all the entries, including the files. The counters are kept.
+        """
+        self._memory.clear()
+        if self.directory is not None:
+            for path in self.directory.glob(f"*{_SOLUTION_SUFFIX}"):
+                path.unlink(missing_ok=True)
+
+    @property
+    def stats(self) -> CacheStats:
+        """
+        Counters of the cache. A hit is a solution found in memory or on disk, and
+        evictions include expired entries. `entries` and `size_bytes` are those of the
+        in-memory tier.
+        """
+        memory = self._memory.stats
+        with self._lock:
+            return CacheStats(
+                hits=memory.hits + self._disk_hits,
+                misses=memory.misses - self._disk_hits,
+                evictions=memory.evictions + self._disk_evictions,
+                entries=memory.entries,
+                size_bytes=memory.size_bytes,
+            )
+
+    def _path(self, key: str) -> pathlib.Path:
+        assert self.directory is not None
+        return self.directory / f"{key}{_SOLUTION_SUFFIX}"
+
+    def _read(self, key: str) -> typing.Optional[bytes]:
+        path = self._path(key)
+        try:
+            modified = path.stat().st_mtime
+            if self.ttl is not None and modified + self.ttl <= time.time():
+                path.unlink(missing_ok=True)
+                with self._lock:
+                    self._disk_evictions += 1
+                return None
+            data = path.read_bytes()
+            # The access time orders the files for eviction, the modification
+            # time is when the entry was stored.
+            os.utime(path, (time.time(), modified))
+        except FileNotFoundError:
+            return None
+        return data
+
+    def _write(self, key: str, data: bytes):
+        assert self.directory is not None
+        if len(data) > self.max_disk_bytes:
+            return
+        # Write to a temporary file first, so readers never see a partial file.
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self._evict_files()
+
+    def _evict_files(self):
+        assert self.directory is not None
+        files = []
+        for path in self.directory.glob(f"*{_SOLUTION_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_atime, stat.st_size, path))
+        size = sum(file_size for _, file_size, _ in files)
+        for _, file_size, path in sorted(files):
+            if size <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            size -= file_size
+            with self._lock:
+                self._disk_evictions += 1
+
+
+_SOLUTION_SUFFIX = ".solution"
+
+
+def instance_digest(instance: "Instance", *extra: typing.Any) -> str:
+    """
+    A stable digest of the parts of an ommx.v1.Instance that determine the amplify
+    model: the sense, the used decision variables, the objective and the constraints.
+
+    Instance metadata such as the title does not change the digest. Additional
+    values, e.g. build options, can be mixed in with `extra`.
+    """
+    return _instance_digest(instance, *extra)[0]
+
+
+def _instance_digest(
+    instance: "Instance", *extra: typing.Any
+) -> typing.Tuple[str, int]:
+    """
+    The digest of :func:`instance_digest` together with the number of bytes hashed.
+    """
+    hasher = hashlib.sha256()
+    size = 0
+
+    def update(data: bytes):
+        nonlocal size
+        hasher.update(len(data).to_bytes(8, "little"))
+        hasher.update(data)
+        size += len(data)
+
+    update(repr((instance.sense, extra)).encode())
+    for var in instance.used_decision_variables:
+        update(var.to_bytes())
+    update(instance.objective.to_bytes())
+    for constraint in instance.constraints:
+        update(constraint.to_bytes())
+    return hasher.hexdigest(), size
@@ -0,0 +1,99 @@
+from collections.abc import Sequence
+
+from ommx.v1 import Function, Instance, Linear, Polynomial, Quadratic
+
+
+def decompose(instance: Instance) -> list[Instance]:
+    """
+    Split an instance into independent instances, one per connected component of its
+    variable interaction graph.
+
+    Two used decision variables interact if they appear in the same term of the
+    objective or in the same constraint. Each component gets its decision variables,
+    the terms of the objective on them and the constraints on them, so that the
+    optimal solutions of the components together form an optimal solution of
+    `instance`. The constant of the objective goes to the first component.
+    Constraints without variables, removed constraints and named functions are left
+    out, and are only accounted for when `instance` is evaluated.
+
+    Components are ordered by their smallest variable id.
+    """
+    parents: dict[int, int] = {}
+
+    def find(id: int) -> int:
+        root = parents.setdefault(id, id)
+        while root != parents[root]:
+            # Path halving.
+            parents[root] = parents[parents[root]]
+            root = parents[root]
+        return root
+
+    def union(ids) -> int | None:
+        roots = [find(id) for id in ids]
+        if not roots:
+            return None
+        root = min(roots)
+        for other in roots:
+            parents[other] = root
+        return root
+
+    objective_terms = instance.objective.terms
+    for ids in objective_terms:
+        union(ids)
+    constraints = instance.constraints
+    for constr in constraints:
+        union(constr.function.used_decision_variable_ids())
+
+    components: dict[int, int] = {}
+    for id in sorted(parents):
+        components.setdefault(find(id), len(components))
+    if len(components) <= 1:
+        return [instance] if components else []
+
+    terms: list[dict[Sequence[int], float]] = [{} for _ in components]
+    for ids, coefficient in objective_terms.items():
+        position = components[find(ids[0])] if ids else 0
+        terms[position][ids] = coefficient
+    component_constraints: list[list] = [[] for _ in components]
+    for constr in constraints:
+        ids = constr.function.used_decision_variable_ids()
+        if ids:
+            component_constraints[components[find(next(iter(ids)))]].append(constr)
+    decision_variables: list[list] = [[] for _ in components]
+    for var in instance.used_decision_variables:
+        decision_variables[components[find(var.id)]].append(var)
+
+    return [
+        Instance.from_components(
+            decision_variables=decision_variables[position],
+            objective=_function(terms[position]),
+            constraints=component_constraints[position],
+            sense=instance.sense,
+        )
+        for position in range(len(components))
+    ]
+
+
+def _function(terms: dict[Sequence[int], float]) -> Function:
+    """
+    The function with the given terms, as a linear or quadratic function if its
+    degree allows it.
+    """
+    degree = max((len(ids) for ids in terms), default=0)
+    if degree > 2:
+        return Function(Polynomial(terms=terms))
+    linear = Linear(
+        terms={ids[0]: value for ids, value in terms.items() if len(ids) == 1},
+        constant=terms.get((), 0.0),
+    )
+    if degree < 2:
+        return Function(linear)
+    quadratic = [(ids, value) for ids, value in terms.items() if len(ids) == 2]
+    return Function(
+        Quadratic(
+            columns=[ids[1] for ids, _ in quadratic],
+            rows=[ids[0] for ids, _ in quadratic],
+            values=[value for _, value in quadratic],
+            linear=linear,
+        )
+    )
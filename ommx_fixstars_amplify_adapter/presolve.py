@@ -0,0 +1,216 @@
+import math
+from dataclasses import dataclass, field
+
+from ommx.v1 import Constraint, DecisionVariable, Function, Instance, State
+
+TOLERANCE = 1e-9
+"""
+Absolute tolerance of the presolve comparisons, e.g. for a redundant constraint or an
+integral bound.
+"""
+
+
+@dataclass
+class Presolved:
+    """
+    An instance reduced by :func:`presolve`, and how to restore the eliminated values.
+    """
+
+    instance: Instance
+    """
+    The reduced instance. Only its decision variables, objective, constraints and
+    sense are meaningful.
+    """
+    fixed_values: dict[int, float] = field(default_factory=dict)
+    """Values of the used decision variables that are not used by `instance`."""
+    removed_constraint_ids: list[int] = field(default_factory=list)
+    """Ids of the constraints satisfied by any values within the bounds of `instance`."""
+
+
+def presolve(instance: Instance) -> Presolved:
+    """
+    Reduce an instance before it is converted to an amplify model.
+
+    Until nothing changes:
+
+    - variables with equal lower and upper bounds are fixed and substituted into the
+      objective and the constraints,
+    - constraints on a single variable of degree 1 are turned into bounds and removed,
+    - linear constraints satisfied for any values within the bounds, including
+      constant ones, are removed.
+
+    Semi-continuous and semi-integer variables are left as they are. Constraints
+    proved infeasible are kept, so that they are reported when the solution is
+    evaluated.
+
+    The optimal solutions of the reduced instance, completed with
+    `fixed_values`, are the optimal solutions of `instance`.
+    """
+    return _Presolver(instance).run()
+
+
+class _Presolver:
+    def __init__(self, instance: Instance):
+        self.instance = instance
+        self.variables = {var.id: var for var in instance.used_decision_variables}
+        self.bounds = {
+            var.id: (var.bound.lower, var.bound.upper)
+            for var in self.variables.values()
+            if _is_presolvable(var)
+        }
+        self.objective = instance.objective
+        self.functions = {constr.id: constr.function for constr in instance.constraints}
+        self.substituted: set[int] = set()
+        self.fixed_values: dict[int, float] = {}
+        self.removed: list[int] = []
+
+    def run(self) -> Presolved:
+        constraints = {constr.id: constr for constr in self.instance.constraints}
+        changed = True
+        while changed:
+            changed = self._fix_variables()
+            for constraint_id in list(self.functions):
+                if self._reduce_constraint(constraints[constraint_id]):
+                    changed = True
+
+        used_ids = set(self.objective.used_decision_variable_ids())
+        for func in self.functions.values():
+            used_ids.update(func.used_decision_variable_ids())
+        # Variables left only in removed constraints can take any value within
+        # their bounds.
+        for id in self.variables.keys() - used_ids - self.fixed_values.keys():
+            self.fixed_values[id] = self._feasible_value(id)
+
+        reduced = Instance.from_components(
+            decision_variables=[
+                self._decision_variable(self.variables[id]) for id in sorted(used_ids)
+            ],
+            objective=self.objective,
+            constraints=[
+                _replace_function(constr, self.functions[constr.id])
+                if constr.id in self.substituted
+                else constr
+                for constr in self.instance.constraints
+                if constr.id in self.functions
+            ],
+            sense=self.instance.sense,
+        )
+        return Presolved(reduced, self.fixed_values, self.removed)
+
+    def _fix_variables(self) -> bool:
+        fixed = {
+            id: lower
+            for id, (lower, upper) in self.bounds.items()
+            if lower == upper and id not in self.fixed_values
+        }
+        if not fixed:
+            return False
+        self.fixed_values.update(fixed)
+        state = State(entries=fixed)
+        if not fixed.keys().isdisjoint(self.objective.used_decision_variable_ids()):
+            self.objective = self.objective.partial_evaluate(state)
+        for constraint_id, func in self.functions.items():
+            if not fixed.keys().isdisjoint(func.used_decision_variable_ids()):
+                self.functions[constraint_id] = func.partial_evaluate(state)
+                self.substituted.add(constraint_id)
+        return True
+
+    def _reduce_constraint(self, constr: Constraint) -> bool:
+        """
+        Remove the constraint if it is redundant or a bound, tightening the bound.
+        Returns whether anything changed.
+        """
+        func = self.functions[constr.id]
+        equality = constr.equality == Constraint.EQUAL_TO_ZERO
+        if func.degree() > 1:
+            return False
+
+        linear = func.linear_terms
+        constant = func.constant_term
+        if len(linear) == 1:
+            ((id, coefficient),) = linear.items()
+            if id in self.bounds and self._tighten(
+                id, -constant / coefficient, equality, coefficient > 0
+            ):
+                del self.functions[constr.id]
+                self.removed.append(constr.id)
+                return True
+            return False
+
+        low, high = constant, constant
+        for id, coefficient in linear.items():
+            lower, upper = self._activity_bounds(id)
+            if coefficient > 0:
+                low += coefficient * lower
+                high += coefficient * upper
+            else:
+                low += coefficient * upper
+                high += coefficient * lower
+        if high <= TOLERANCE and (not equality or low >= -TOLERANCE):
+            del self.functions[constr.id]
+            self.removed.append(constr.id)
+            return True
+        return False
+
+    def _tighten(self, id: int, value: float, equality: bool, upper_side: bool) -> bool:
+        """
+        Apply `x == value`, or `x <= value` if `upper_side` else `x >= value`, to the
+        bounds of `x`. Returns `False` if the bounds would become infeasible.
+        """
+        lower, upper = self.bounds[id]
+        integral = self.variables[id].kind != DecisionVariable.CONTINUOUS
+        if equality or upper_side:
+            new_upper = float(math.floor(value + TOLERANCE)) if integral else value
+            upper = min(upper, new_upper)
+        if equality or not upper_side:
+            new_lower = float(math.ceil(value - TOLERANCE)) if integral else value
+            lower = max(lower, new_lower)
+        if lower > upper:
+            return False
+        self.bounds[id] = (lower, upper)
+        return True
+
+    def _activity_bounds(self, id: int) -> tuple[float, float]:
+        if id in self.bounds:
+            return self.bounds[id]
+        bound = self.variables[id].bound
+        return min(bound.lower, 0.0), max(bound.upper, 0.0)
+
+    def _feasible_value(self, id: int) -> float:
+        lower, upper = self._activity_bounds(id)
+        return min(max(0.0, lower), upper)
+
+    def _decision_variable(self, var: DecisionVariable) -> DecisionVariable:
+        bounds = self.bounds.get(var.id)
+        if bounds is None or bounds == (var.bound.lower, var.bound.upper):
+            return var
+        return DecisionVariable.of_type(
+            var.kind,
+            var.id,
+            lower=bounds[0],
+            upper=bounds[1],
+            name=var.name,
+            subscripts=var.subscripts,
+            parameters=var.parameters,
+            description=var.description,
+        )
+
+
+def _is_presolvable(variable: DecisionVariable) -> bool:
+    return variable.kind in (
+        DecisionVariable.BINARY,
+        DecisionVariable.INTEGER,
+        DecisionVariable.CONTINUOUS,
+    )
+
+
+def _replace_function(constr: Constraint, func: Function) -> Constraint:
+    return Constraint(
+        id=constr.id,
+        function=func,
+        equality=constr.equality,
+        name=constr.name,
+        subscripts=constr.subscripts,
+        description=constr.description,
+        parameters=constr.parameters,
+    )
@@ -0,0 +1,96 @@
+import contextlib
+import time
+import tracemalloc
+import typing
+from dataclasses import dataclass, field
+
+StatsSink = typing.Callable[[str, "ConversionStats"], None]
+"""
+Callback invoked with the name of a stage and the stats, each time a stage completes.
+"""
+
+
+@dataclass
+class ConversionStats:
+    """
+    Measurements of a conversion between ommx.v1.Instance and amplify.Model, and of
+    the solve and decode steps that follow it.
+
+    The stages of `OMMXFixstarsAmplifyAdapter` are `presolve` if enabled,
+    `decision_variables`, `objective` and `constraints` when the model is built, or `model_cache` when it is taken
+    from a :class:`ModelCache`, then `solve`, `decode` and `evaluate`, and `update`
+    for :meth:`OMMXFixstarsAmplifyAdapter.update`. The stages of
+    `OMMXInstanceBuilder` are `decision_variables`, `objective`, `constraints` and
+    `instance`, which :meth:`OMMXInstanceBuilder.write` skips. A stage run more than
+    once accumulates its time.
+
+    Example:
+    =========
+
+    .. doctest::
+
+        >>> from ommx_fixstars_amplify_adapter import OMMXFixstarsAmplifyAdapter
+        >>> from ommx.v1 import Instance, DecisionVariable
+        >>>
+        >>> x = [DecisionVariable.binary(i) for i in range(3)]
+        >>> ommx_instance = Instance.from_components(
+        ...     decision_variables=x,
+        ...     objective=x[0] * x[1] + x[2],
+        ...     constraints=[x[0] + x[1] + x[2] <= 2],
+        ...     sense=Instance.MINIMIZE,
+        ... )
+        >>> completed = []
+        >>> adapter = OMMXFixstarsAmplifyAdapter(
+        ...     ommx_instance, stats_sink=lambda stage, stats: completed.append(stage)
+        ... )
+        >>> model = adapter.solver_input
+        >>> completed
+        ['decision_variables', 'objective', 'constraints']
+        >>> stats = adapter.stats
+        >>> stats.num_variables, stats.num_constraints, stats.num_terms, stats.max_degree
+        (3, 1, 6, 2)
+    """
+
+    timings: typing.Dict[str, float] = field(default_factory=dict)
+    """Wall time of each completed stage, in seconds."""
+    num_variables: int = 0
+    num_constraints: int = 0
+    num_terms: int = 0
+    """Number of terms, including constants, of the objective and the constraints."""
+    max_degree: int = 0
+    """Largest degree of the objective and the constraints."""
+    reduced_terms: int = 0
+    """
+    Number of terms removed by collapsing the powers of binary variables in the
+    objective and the constraints, before the amplify model is built.
+    """
+    reduced_degree: int = 0
+    """Largest drop of the degree of a function by collapsing binary powers."""
+    peak_memory: typing.Optional[int] = None
+    """
+    Peak memory in bytes traced by `tracemalloc` at the end of any stage, or `None`
+    if `tracemalloc` is not tracing.
+    """
+    sink: typing.Optional[StatsSink] = field(default=None, repr=False, compare=False)
+
+    def add_function(self, num_terms: int, degree: int):
+        """
+        Count a converted objective or constraint function.
+        """
+        self.num_terms += num_terms
+        self.max_degree = max(self.max_degree, degree)
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> typing.Iterator[None]:
+        """
+        Measure the wall time of the enclosed block as the stage `name`, and report
+        it to the sink. Nothing is recorded if the block raises.
+        """
+        start = time.perf_counter()
+        yield
+        self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+        if tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            self.peak_memory = max(self.peak_memory or 0, peak)
+        if self.sink is not None:
+            self.sink(name, self)
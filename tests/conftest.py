@@ -1,6 +1,10 @@
 import typing
+from datetime import timedelta
 
 import amplify
+import pytest
+
+from ommx_fixstars_amplify_adapter.annealing import _CustomClientResult
 
 
 def assert_amplify_model(model1: amplify.Model, model2: amplify.Model) -> None:
@@ -18,14 +22,16 @@ def assert_amplify_model(model1: amplify.Model, model2: amplify.Model) -> None:
         expression1: typing.Union[amplify.Poly, amplify.Matrix],
         expression2: typing.Union[amplify.Poly, amplify.Matrix],
     ) -> None:
+        # An objective may be held either as a Poly or as a Matrix depending on how
+        # it was built, so compare the polynomials they represent.
+        if isinstance(expression1, amplify.Matrix):
+            expression1 = expression1.to_poly()
+        if isinstance(expression2, amplify.Matrix):
+            expression2 = expression2.to_poly()
         if isinstance(expression1, amplify.Poly) and isinstance(
             expression2, amplify.Poly
         ):
             assert expression1.as_dict() == expression2.as_dict()
-        elif isinstance(expression1, amplify.Matrix) and isinstance(
-            expression2, amplify.Matrix
-        ):
-            assert expression1.to_poly().as_dict() == expression2.to_poly().as_dict()
         else:
             raise AssertionError()
 
@@ -44,3 +50,53 @@ def assert_amplify_model(model1: amplify.Model, model2: amplify.Model) -> None:
             model1.constraints[i].conditional[2] == model2.constraints[i].conditional[2]
         )
         assert model1.constraints[i].label == model2.constraints[i].label
+
+
+class FixedSolutionClient:
+    """
+    A local stand-in for an Amplify client, returning the given solutions.
+
+    Each solution is the list of values of the variables of the solved model,
+    in the order of `amplify.Model.variables`.
+    """
+
+    def __init__(self, solutions: typing.List[typing.List[float]]):
+        self.parameters: typing.Any = None
+        self.solutions = solutions
+
+    @property
+    def acceptable_degrees(self) -> amplify.AcceptableDegrees:
+        degrees = {
+            "Binary": "HighOrder",
+            "Integer": "HighOrder",
+            "Real": "HighOrder",
+        }
+        return amplify.AcceptableDegrees(
+            objective=degrees,  # type: ignore
+            equality_constraints=degrees,  # type: ignore
+            inequality_constraints=degrees,  # type: ignore
+        )
+
+    @property
+    def version(self) -> str:
+        return "local"
+
+    def solve(
+        self, objective: amplify.Poly, constraints, dry_run: bool = False
+    ) -> typing.Optional[_CustomClientResult]:
+        if dry_run:
+            return None
+        return _CustomClientResult(self.solutions, timedelta(0))
+
+
+requires_custom_client = pytest.mark.skipif(
+    not hasattr(amplify, "CustomClientProtocol"),
+    reason="Custom Amplify clients are not supported by this amplify version",
+)
+
+
+def pytest_collection_modifyitems(items):
+    # The doctest of LocalAnnealingClient solves with it.
+    for item in items:
+        if item.name.endswith(".LocalAnnealingClient"):
+            item.add_marker(requires_custom_client)
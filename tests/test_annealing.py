@@ -0,0 +1,129 @@
+import itertools
+
+import amplify
+import pytest
+from ommx.v1 import DecisionVariable, Instance, Linear, State
+
+from ommx_fixstars_amplify_adapter import (
+    LocalAnnealingClient,
+    OMMXFixstarsAmplifyAdapter,
+    OMMXFixstarsAmplifyAdapterError,
+)
+from conftest import FixedSolutionClient, requires_custom_client
+
+
+def knapsack_instance() -> Instance:
+    weights = [3, 4, 5, 6, 7]
+    profits = [4, 5, 7, 8, 9]
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(5)]
+    y = DecisionVariable.integer(5, lower=0, upper=2, name="y")
+    return Instance.from_components(
+        decision_variables=x + [y],
+        objective=sum(p * xi for p, xi in zip(profits, x)) + y,
+        constraints=[
+            (Linear(terms=dict(enumerate(weights))) <= 14).set_id(0),
+            (x[0] + x[1] + y <= 2).set_id(1),
+        ],
+        sense=Instance.MAXIMIZE,
+    )
+
+
+def best_objective(instance: Instance) -> float:
+    best = None
+    for values in itertools.product([0, 1], [0, 1], [0, 1], [0, 1], [0, 1], [0, 1, 2]):
+        solution = instance.evaluate(dict(enumerate(map(float, values))))
+        if solution.feasible and (best is None or solution.objective > best):
+            best = solution.objective
+    assert best is not None
+    return best
+
+
+@requires_custom_client
+def test_solve_with_local_annealing():
+    instance = knapsack_instance()
+    client = LocalAnnealingClient(num_sweeps=1000, num_reads=20, seed=0)
+    solution = OMMXFixstarsAmplifyAdapter.solve(instance, client=client)
+    assert solution.feasible
+    assert solution.objective == best_objective(instance)
+
+
+@requires_custom_client
+def test_local_annealing_seed():
+    instance = knapsack_instance()
+    adapter = OMMXFixstarsAmplifyAdapter(instance)
+
+    def sampled_values(seed):
+        client = LocalAnnealingClient(num_sweeps=10, num_reads=4, seed=seed)
+        result = amplify.solve(adapter.solver_input, client)
+        result.filter_solution = False
+        return [list(solution.values.values()) for solution in result]
+
+    assert sampled_values(1) == sampled_values(1)
+    assert len(sampled_values(1)) == 4
+
+
+@requires_custom_client
+def test_local_annealing_time_limit():
+    x = [DecisionVariable.binary(i) for i in range(3)]
+    instance = Instance.from_components(
+        decision_variables=x,
+        objective=x[0] * x[1] - x[2],
+        constraints=[],
+        sense=Instance.MINIMIZE,
+    )
+    client = LocalAnnealingClient(num_sweeps=10**9, time_limit_ms=10)
+    solution = OMMXFixstarsAmplifyAdapter.solve(instance, client=client)
+    assert solution.objective == -1.0
+
+
+@pytest.mark.skipif(
+    hasattr(amplify, "CustomClientProtocol"),
+    reason="Custom Amplify clients are supported by this amplify version",
+)
+def test_local_annealing_unsupported():
+    with pytest.raises(OMMXFixstarsAmplifyAdapterError):
+        LocalAnnealingClient()
+
+
+@requires_custom_client
+def test_initial_state():
+    x = [DecisionVariable.binary(i) for i in range(2)]
+    y = DecisionVariable.integer(2, lower=0, upper=5)
+    instance = Instance.from_components(
+        decision_variables=x + [y],
+        objective=x[0] * y - 2 * x[0] + x[1] * y,
+        constraints=[(x[0] + x[1] == 1).set_id(0)],
+        sense=Instance.MINIMIZE,
+    )
+    best = State(entries={0: 1.0, 1: 0.0, 2: 0.0})
+    client = LocalAnnealingClient(num_sweeps=0, num_reads=1)
+
+    adapter = OMMXFixstarsAmplifyAdapter(instance)
+    initial = adapter.initial_values(State(entries={0: 1.0, 1: 0.0, 2: 3.0}), client)
+    _, mapping = adapter.model.to_intermediate_model(client.acceptable_degrees)
+    encoded_y = mapping[adapter.variable_map[2]].as_dict()
+    assert encoded_y.pop((), 0.0) + sum(
+        coefficient * initial[id] for (id,), coefficient in encoded_y.items()
+    ) == pytest.approx(3.0)
+
+    # Without any sweep, only improving flips are taken from the initial state.
+    solution = OMMXFixstarsAmplifyAdapter.solve(
+        instance, client=client, initial_state=best
+    )
+    assert solution.state.entries == best.entries
+    assert client.parameters.initial_values is None
+
+
+def test_initial_state_unsupported():
+    x = DecisionVariable.binary(0)
+    instance = Instance.from_components(
+        decision_variables=[x],
+        objective=x,
+        constraints=[],
+        sense=Instance.MINIMIZE,
+    )
+    client = FixedSolutionClient([[0.0]])
+    with pytest.raises(OMMXFixstarsAmplifyAdapterError):
+        OMMXFixstarsAmplifyAdapter.solve(
+            instance, client=client, initial_state=State(entries={0: 0.0})
+        )
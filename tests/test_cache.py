@@ -0,0 +1,138 @@
+from ommx.v1 import DecisionVariable, Instance, State
+
+from ommx_fixstars_amplify_adapter import ModelCache, SolutionCache, instance_digest
+from ommx_fixstars_amplify_adapter.adapter import OMMXFixstarsAmplifyAdapter
+from conftest import FixedSolutionClient, assert_amplify_model, requires_custom_client
+
+
+def knapsack_instance(sense=Instance.MAXIMIZE) -> Instance:
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(3)]
+    y = DecisionVariable.integer(3, lower=0, upper=5, name="y")
+    return Instance.from_components(
+        decision_variables=x + [y],
+        objective=x[0] + 2 * x[1] + 3 * x[2] * y,
+        constraints=[(x[0] + x[1] + x[2] + y <= 4).set_id(0)],
+        sense=sense,
+    )
+
+
+def test_model_cache():
+    cache = ModelCache()
+    first = OMMXFixstarsAmplifyAdapter(knapsack_instance(), model_cache=cache)
+    second = OMMXFixstarsAmplifyAdapter(knapsack_instance(), model_cache=cache)
+    assert cache.stats.misses == 0  # the models are built on first use
+    assert_amplify_model(second.solver_input, first.solver_input)
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+    assert stats.size_bytes > 0
+
+    assert second.model is not first.model
+    assert second.variable_index == first.variable_index
+
+    # Building with other options is a different entry.
+    OMMXFixstarsAmplifyAdapter(
+        knapsack_instance(), batch_variables=True, model_cache=cache
+    ).solver_input
+    assert cache.stats.misses == 2
+
+
+def test_instance_digest():
+    digest = instance_digest(knapsack_instance())
+    assert instance_digest(knapsack_instance()) == digest
+    assert instance_digest(knapsack_instance(Instance.MINIMIZE)) != digest
+    assert instance_digest(knapsack_instance(), True) != digest
+
+
+def test_model_cache_eviction():
+    cache = ModelCache(max_bytes=10)
+    cache.put("a", 1, 4)
+    cache.put("b", 2, 4)
+    assert cache.get("a") == 1
+    cache.put("c", 3, 4)  # "b" is the least recently used
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    cache.put("d", 4, 11)  # larger than the budget
+    assert cache.get("d") is None
+
+    stats = cache.stats
+    assert (stats.evictions, stats.entries, stats.size_bytes) == (1, 2, 8)
+    assert (stats.hits, stats.misses) == (2, 2)
+
+
+class CountingClient(FixedSolutionClient):
+    def __init__(self, solutions):
+        super().__init__(solutions)
+        self.calls = 0
+
+    def solve(self, objective, constraints, dry_run=False):
+        if not dry_run:
+            self.calls += 1
+        return super().solve(objective, constraints, dry_run)
+
+
+@requires_custom_client
+def test_solution_cache():
+    cache = SolutionCache()
+    client = CountingClient([[1.0, 0.0, 1.0, 1.0]])
+    solutions = [
+        OMMXFixstarsAmplifyAdapter.solve(
+            knapsack_instance(), client=client, solution_cache=cache
+        )
+        for _ in range(2)
+    ]
+    assert client.calls == 1
+    assert solutions[1].state.entries == solutions[0].state.entries
+    assert solutions[1].objective == solutions[0].objective == 4.0
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+
+    # Other parameters are another entry.
+    client.parameters = {"seed": 1}
+    OMMXFixstarsAmplifyAdapter.solve(
+        knapsack_instance(), client=client, solution_cache=cache
+    )
+    assert client.calls == 2
+
+    # So is a solve started from an initial state.
+    instance = knapsack_instance()
+    initial_state = State(entries={0: 1.0, 1: 0.0, 2: 0.0, 3: 0.0})
+    assert cache.key(instance, client, initial_state) != cache.key(instance, client)
+
+
+def test_solution_cache_disk(tmp_path):
+    instance = knapsack_instance()
+    solution = instance.evaluate({0: 1.0, 1: 0.0, 2: 1.0, 3: 1.0})
+    cache = SolutionCache(directory=tmp_path)
+    cache.put("a", solution)
+
+    # Another cache, e.g. in another process, reads the file.
+    other = SolutionCache(directory=tmp_path)
+    stored = other.get("a")
+    assert stored is not None
+    assert stored.state.entries == solution.state.entries
+    assert other.get("a") is not None
+    stats = other.stats
+    assert (stats.hits, stats.misses, stats.entries) == (2, 0, 1)
+    assert other.get("b") is None
+
+    other.clear()
+    assert cache.get("a") is not None  # still in memory
+    assert SolutionCache(directory=tmp_path).get("a") is None
+
+
+def test_solution_cache_eviction(tmp_path):
+    instance = knapsack_instance()
+    solution = instance.evaluate({0: 1.0, 1: 0.0, 2: 1.0, 3: 1.0})
+    size = len(solution.to_bytes())
+
+    expiring = SolutionCache(ttl=0, directory=tmp_path)
+    expiring.put("a", solution)
+    assert expiring.get("a") is None
+    assert expiring.stats.evictions == 2  # in memory and on disk
+    assert list(tmp_path.iterdir()) == []
+
+    cache = SolutionCache(max_bytes=size, directory=tmp_path, max_disk_bytes=2 * size)
+    for key in ["a", "b", "c"]:
+        cache.put(key, solution)
+    assert cache.stats.entries == 1
+    assert sorted(path.stem for path in tmp_path.iterdir()) == ["b", "c"]
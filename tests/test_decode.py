@@ -0,0 +1,87 @@
+import amplify
+from ommx.v1 import DecisionVariable, Instance
+
+from ommx_fixstars_amplify_adapter.adapter import OMMXFixstarsAmplifyAdapter
+from conftest import FixedSolutionClient, requires_custom_client
+
+
+@requires_custom_client
+def test_decode_to_state():
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in [0, 2, 3]]
+    y = DecisionVariable.integer(1, lower=0, upper=5, name="y")
+    instance = Instance.from_components(
+        decision_variables=x + [y],
+        objective=x[0] + 2 * x[1] + 3 * x[2] + y,
+        constraints=[(x[0] + x[1] + x[2] == 1).set_id(0)],
+        sense=Instance.MINIMIZE,
+    )
+
+    # With batched variables the binaries are created before y, so the order of
+    # the amplify variables differs from the order of the OMMX ids.
+    adapter = OMMXFixstarsAmplifyAdapter(instance, batch_variables=True)
+    client = FixedSolutionClient([[0.0, 1.0, 0.0, 4.0]])
+    result = amplify.solve(adapter.solver_input, client)
+
+    state = adapter.decode_to_state(result)
+    assert state.entries == {0: 0.0, 1: 4.0, 2: 1.0, 3: 0.0}
+
+    solution = adapter.decode(result)
+    assert solution.objective == 6.0
+    assert solution.feasible
+
+
+@requires_custom_client
+def test_decode_to_sampleset():
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(3)]
+    instance = Instance.from_components(
+        decision_variables=x,
+        objective=x[0] + 2 * x[1] + 3 * x[2],
+        constraints=[(x[0] + x[1] + x[2] == 1).set_id(0)],
+        sense=Instance.MAXIMIZE,
+    )
+
+    adapter = OMMXFixstarsAmplifyAdapter(instance)
+    client = FixedSolutionClient(
+        [
+            [1.0, 0.0, 0.0],
+            [0.0, 0.0, 1.0],
+            [1.0, 1.0, 0.0],
+            [1.0, 0.0, 0.0],
+        ]
+    )
+    result = amplify.solve(adapter.solver_input, client)
+
+    sample_set = adapter.decode_to_sampleset(result)
+    # The infeasible solution is kept, and the duplicated one is not merged away.
+    assert len(sample_set.sample_ids) == 4
+    assert sorted(sample_set.objectives.values()) == [1.0, 1.0, 3.0, 3.0]
+    assert sum(sample_set.feasible.values()) == 3
+    assert sample_set.best_feasible.objective == 3.0
+    assert sample_set.best_feasible.state.entries == {0: 0.0, 1: 0.0, 2: 1.0}
+    # The filter setting of the result is left as it was.
+    assert result.filter_solution
+    assert len(result.solutions) == 3
+
+
+@requires_custom_client
+def test_decode_infeasible():
+    x = [DecisionVariable.binary(i) for i in range(3)]
+    instance = Instance.from_components(
+        decision_variables=x,
+        objective=x[0] + 2 * x[1] + 3 * x[2],
+        constraints=[(x[0] + x[1] + x[2] == 1).set_id(0)],
+        sense=Instance.MINIMIZE,
+    )
+
+    adapter = OMMXFixstarsAmplifyAdapter(instance)
+    client = FixedSolutionClient([[1.0, 1.0, 0.0]])
+    result = amplify.solve(adapter.solver_input, client)
+
+    solution = adapter.decode(result)
+    assert not solution.feasible
+    assert solution.state.entries == {0: 1.0, 1: 1.0, 2: 0.0}
+    assert result.filter_solution
+
+    state = adapter.decode_to_state(result)
+    assert state.entries == {0: 1.0, 1: 1.0, 2: 0.0}
+    assert result.filter_solution
@@ -0,0 +1,69 @@
+from ommx.v1 import DecisionVariable, Instance, function_pb2
+
+from ommx_fixstars_amplify_adapter import LocalAnnealingClient
+from ommx_fixstars_amplify_adapter.adapter import OMMXFixstarsAmplifyAdapter
+from ommx_fixstars_amplify_adapter.decompose import decompose
+from conftest import requires_custom_client
+
+
+def separable_instance() -> Instance:
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(6)]
+    y = DecisionVariable.integer(6, lower=0, upper=3, name="y")
+    unused = DecisionVariable.binary(7, name="unused")
+    return Instance.from_components(
+        decision_variables=x + [y, unused],
+        objective=x[0] * x[1] + 2 * x[2] + x[3] * x[5] - y + 1,
+        constraints=[
+            (x[1] + x[4] == 1).set_id(0),
+            (x[5] + y <= 2).set_id(1),
+            (x[2] + x[4] <= 1).set_id(2),
+        ],
+        sense=Instance.MINIMIZE,
+    )
+
+
+def test_decompose():
+    components = decompose(separable_instance())
+    assert len(components) == 2
+
+    first, second = components
+    assert [var.id for var in first.used_decision_variables] == [0, 1, 2, 4]
+    assert first.objective.terms == {(0, 1): 1.0, (2,): 2.0, (): 1.0}
+    assert [constr.id for constr in first.constraints] == [0, 2]
+
+    assert [var.id for var in second.used_decision_variables] == [3, 5, 6]
+    assert second.objective.terms == {(3, 5): 1.0, (6,): -1.0}
+    assert [constr.id for constr in second.constraints] == [1]
+    assert second.sense == Instance.MINIMIZE
+
+
+def test_decompose_connected():
+    x = [DecisionVariable.binary(i) for i in range(3)]
+    instance = Instance.from_components(
+        decision_variables=x,
+        objective=x[0] + x[2],
+        constraints=[(x[0] + x[1] + x[2] == 1).set_id(0)],
+        sense=Instance.MAXIMIZE,
+    )
+    assert decompose(instance) == [instance]
+
+
+@requires_custom_client
+def test_solve_decomposed():
+    instance = separable_instance()
+    clients = [LocalAnnealingClient(num_sweeps=100, seed=0) for _ in range(2)]
+    solution = OMMXFixstarsAmplifyAdapter.solve_decomposed(instance, clients=clients)
+    assert solution.feasible
+    assert solution.objective == -1.0
+    assert solution.state.entries[6] == 2.0
+    assert solution.state.entries[7] == 0.0
+
+
+def test_decompose_keeps_degree():
+    kinds = [
+        function_pb2.Function.FromString(component.objective.to_bytes()).WhichOneof(
+            "function"
+        )
+        for component in decompose(separable_instance())
+    ]
+    assert kinds == ["quadratic", "quadratic"]
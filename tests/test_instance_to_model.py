@@ -1,3 +1,5 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import amplify
 import pytest
 from ommx.v1 import (
@@ -10,6 +12,7 @@ from ommx.v1 import (
 )
 
 from ommx_fixstars_amplify_adapter.exception import OMMXFixstarsAmplifyAdapterError
+from ommx_fixstars_amplify_adapter import adapter as adapter_module
 from ommx_fixstars_amplify_adapter.adapter import OMMXFixstarsAmplifyAdapter
 from conftest import assert_amplify_model
 
@@ -71,6 +74,7 @@ def test_instance_to_model():
     constraint1 = Constraint(
         function=constraint1_func,
         equality=Constraint.LESS_THAN_OR_EQUAL_TO_ZERO,
+        id=0,
         name="constraintA",
     )
     constraints.append(constraint1)
@@ -83,7 +87,10 @@ def test_instance_to_model():
         linear=Linear(terms={}, constant=-13.0),
     )
     constraint2 = Constraint(
-        function=constraint2_func, equality=Constraint.EQUAL_TO_ZERO, name="constraintB"
+        function=constraint2_func,
+        equality=Constraint.EQUAL_TO_ZERO,
+        id=1,
+        name="constraintB",
     )
     constraints.append(constraint2)
 
@@ -92,6 +99,7 @@ def test_instance_to_model():
     constraint3 = Constraint(
         function=constraint3_func * -1,
         equality=Constraint.LESS_THAN_OR_EQUAL_TO_ZERO,
+        id=2,
         name="constraintC",
     )
     constraints.append(constraint3)
@@ -101,6 +109,7 @@ def test_instance_to_model():
     constraint4 = Constraint(
         function=constraint4_func * -1,
         equality=Constraint.LESS_THAN_OR_EQUAL_TO_ZERO,
+        id=3,
         name="constraintD",
     )
     constraints.append(constraint4)
@@ -110,6 +119,7 @@ def test_instance_to_model():
     constraint5 = Constraint(
         function=constraint5_func,
         equality=Constraint.LESS_THAN_OR_EQUAL_TO_ZERO,
+        id=4,
         name="constraintE",
     )
     constraints.append(constraint5)
@@ -171,8 +181,9 @@ def test_error_unsupported_variable_kind():
         sense=Instance.MINIMIZE,
     )
 
+    adapter = OMMXFixstarsAmplifyAdapter(instance)
     with pytest.raises(OMMXFixstarsAmplifyAdapterError):
-        OMMXFixstarsAmplifyAdapter(instance)
+        adapter.solver_input
 
 
 def test_partial_evaluate():
@@ -268,3 +279,258 @@ def test_relax_constraint():
     )
 
     assert_amplify_model(model, expected_model)
+
+
+def test_bulk_function_to_poly():
+    """
+    The bulk path for functions with degree <= 2 must build the same polynomial
+    as the term-by-term path.
+    """
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(3)]
+    y = DecisionVariable.integer(10, lower=-5, upper=5, name="y")
+    instance = Instance.from_components(
+        decision_variables=x + [y],
+        objective=2 * x[0] * x[1] - 3 * x[2] * y + 4 * y + 1,
+        constraints=[(x[0] * x[0] + x[1] + 2 * y <= 3).set_id(0)],
+        sense=Instance.MINIMIZE,
+    )
+
+    adapter = OMMXFixstarsAmplifyAdapter(instance)
+    for func in [instance.objective] + [c.function for c in instance.constraints]:
+        assert (
+            adapter._quadratic_to_poly(func).as_dict()
+            == adapter._polynomial_to_poly(func).as_dict()
+        )
+
+
+def test_batch_variables():
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(3)]
+    y = [
+        DecisionVariable.integer(10 + i, lower=0, upper=3, name="y", subscripts=[i])
+        for i in range(2)
+    ]
+    instance = Instance.from_components(
+        decision_variables=x + y,
+        objective=x[0] + y[0] + x[1] + y[1] + x[2],
+        constraints=[(x[0] + 2 * y[1] <= 3).set_id(0)],
+        sense=Instance.MINIMIZE,
+    )
+
+    # All variables of a group are created together, binaries first.
+    adapter = OMMXFixstarsAmplifyAdapter(instance, batch_variables=True)
+    model = adapter.solver_input
+
+    gen = amplify.VariableGenerator()
+    x_ = gen.array("Binary", 3)
+    y_ = gen.array("Integer", 2, bounds=(0, 3))
+    for i in range(3):
+        x_[i].as_variable().name = f"x_{{{i}}}"
+    for i in range(2):
+        y_[i].as_variable().name = f"y_{{{i}}}"
+
+    expected_model = amplify.Model()
+    expected_model += x_[0] + y_[0] + x_[1] + y_[1] + x_[2]
+    expected_model += amplify.less_equal(
+        x_[0] + 2.0 * y_[1] - 3.0, 0, label="None [id: 0]"
+    )
+
+    assert_amplify_model(model, expected_model)
+    assert [var.name for var in model.variables] == [
+        "x_{0}",
+        "x_{1}",
+        "x_{2}",
+        "y_{0}",
+        "y_{1}",
+    ]
+    assert adapter.variable_index == {0: 0, 1: 1, 2: 2, 10: 3, 11: 4}
+    assert adapter.variable_map[11].as_dict() == y_[1].as_dict()
+
+
+def test_batch_variables_unnamed():
+    x = [DecisionVariable.binary(i) for i in range(2)]
+    instance = Instance.from_components(
+        decision_variables=x,
+        objective=x[0] + x[1],
+        constraints=[],
+        sense=Instance.MINIMIZE,
+    )
+
+    # Unnamed variables keep the default names of amplify.
+    adapter = OMMXFixstarsAmplifyAdapter(instance, batch_variables=True)
+    assert all(var.name for var in adapter.solver_input.variables)
+
+
+def test_lazy_variable_names():
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(2)]
+    instance = Instance.from_components(
+        decision_variables=x,
+        objective=x[0] + x[1],
+        constraints=[],
+        sense=Instance.MINIMIZE,
+    )
+
+    adapter = OMMXFixstarsAmplifyAdapter(instance, variable_names=False)
+    model = adapter.solver_input
+    assert [var.name for var in model.variables] != ["x_{0}", "x_{1}"]
+
+    adapter.assign_variable_names()
+    assert [var.name for var in model.variables] == ["x_{0}", "x_{1}"]
+
+
+def test_update():
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(3)]
+
+    def make_instance(weights, capacity):
+        return Instance.from_components(
+            decision_variables=x,
+            objective=sum(w * x_i for w, x_i in zip(weights, x)),
+            constraints=[
+                (x[0] + x[1] + x[2] <= capacity).set_id(0),
+                (x[0] + x[1] == 1).set_id(1),
+            ],
+            sense=Instance.MAXIMIZE,
+        )
+
+    adapter = OMMXFixstarsAmplifyAdapter(make_instance([1, 2, 3], 2))
+    variable_map = adapter.variable_map
+    adapter.model.constraints[1].weight = 5.0
+
+    adapter.update(make_instance([1, 2, 4], 1))
+    assert adapter.variable_map is variable_map
+    expected = OMMXFixstarsAmplifyAdapter(make_instance([1, 2, 4], 1))
+    assert_amplify_model(adapter.model, expected.model)
+    # The unchanged constraint is reused, together with its weight.
+    assert [c.weight for c in adapter.model.constraints] == [1.0, 5.0]
+
+    # A change of the decision variables means a full rebuild.
+    x[2] = DecisionVariable.integer(2, lower=0, upper=2, name="x", subscripts=[2])
+    adapter.update(make_instance([1, 2, 4], 1))
+    assert adapter.variable_map is not variable_map
+    expected = OMMXFixstarsAmplifyAdapter(make_instance([1, 2, 4], 1))
+    assert_amplify_model(adapter.model, expected.model)
+
+
+@pytest.mark.parametrize("bulk_poly_min_terms", [1, adapter_module.BULK_POLY_MIN_TERMS])
+@pytest.mark.parametrize("executor_type", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_parallel_constraints(monkeypatch, executor_type, bulk_poly_min_terms):
+    monkeypatch.setattr(adapter_module, "CONSTRAINT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(adapter_module, "BULK_POLY_MIN_TERMS", bulk_poly_min_terms)
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(4)]
+    y = DecisionVariable.integer(10, lower=0, upper=3, name="y")
+    instance = Instance.from_components(
+        decision_variables=x + [y],
+        objective=x[0] + y,
+        constraints=[
+            (x[0] + 2 * x[1] <= 2).set_id(3),
+            (x[0] * x[1] * x[2] <= 0).set_id(1),
+            (x[2] * y + x[3] == 1).set_id(7),
+            (x[1] * x[2] - y <= 0).set_id(2),
+            (x[3] + y == 2).set_id(5),
+        ],
+        sense=Instance.MINIMIZE,
+    )
+
+    expected = OMMXFixstarsAmplifyAdapter(instance)
+    with executor_type(max_workers=2) as executor:
+        adapter = OMMXFixstarsAmplifyAdapter(instance, executor=executor)
+        adapter.solver_input
+    assert_amplify_model(adapter.model, expected.model)
+
+
+@pytest.mark.parametrize("bulk_poly_min_terms", [1, adapter_module.BULK_POLY_MIN_TERMS])
+def test_from_bytes(monkeypatch, bulk_poly_min_terms):
+    monkeypatch.setattr(adapter_module, "CONSTRAINT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(adapter_module, "BULK_POLY_MIN_TERMS", bulk_poly_min_terms)
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(4)]
+    y = DecisionVariable.integer(10, lower=0, upper=3, name="y")
+    instance = Instance.from_components(
+        decision_variables=x + [y],
+        objective=x[0] + y,
+        constraints=[
+            (x[0] + 2 * x[1] <= 2).set_id(3),
+            (x[0] * x[1] * x[2] <= 0).set_id(1),
+            (x[2] * y + x[3] == 1).add_name("c").set_id(7),
+            (x[1] * x[2] <= 0).set_id(2),
+            (x[3] + y == 2).set_id(5),
+        ],
+        sense=Instance.MINIMIZE,
+    )
+
+    expected = OMMXFixstarsAmplifyAdapter(instance)
+    adapter = OMMXFixstarsAmplifyAdapter.from_bytes(memoryview(instance.to_bytes()))
+    assert_amplify_model(adapter.solver_input, expected.solver_input)
+    assert adapter.stats.num_terms == expected.stats.num_terms
+    assert adapter._instance_bytes is None
+
+
+def test_from_bytes_relax_constraint():
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(3)]
+    instance = Instance.from_components(
+        decision_variables=x,
+        objective=x[0] + x[1],
+        constraints=[(x[0] + 2 * x[1] <= 1).set_id(0), (x[1] + x[2] <= 1).set_id(1)],
+        sense=Instance.MINIMIZE,
+    )
+
+    adapter = OMMXFixstarsAmplifyAdapter.from_bytes(instance.to_bytes())
+    adapter.instance.relax_constraint(1, "relax")
+    instance.relax_constraint(1, "relax")
+    expected = OMMXFixstarsAmplifyAdapter(instance)
+    assert len(adapter.solver_input.constraints) == 1
+    assert_amplify_model(adapter.solver_input, expected.solver_input)
+
+
+def test_from_artifact(tmp_path):
+    from ommx.artifact import ArtifactBuilder
+
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(2)]
+    instance = Instance.from_components(
+        decision_variables=x,
+        objective=x[0] + x[1],
+        constraints=[(x[0] + x[1] <= 1).set_id(0)],
+        sense=Instance.MAXIMIZE,
+    )
+    instance.title = "from artifact"
+    builder = ArtifactBuilder.new_archive_unnamed(tmp_path / "instance.ommx")
+    builder.add_instance(instance)
+    artifact = builder.build()
+
+    adapter = OMMXFixstarsAmplifyAdapter.from_artifact(artifact)
+    assert adapter.instance.title == "from artifact"
+    assert_amplify_model(
+        adapter.solver_input, OMMXFixstarsAmplifyAdapter(instance).solver_input
+    )
+
+
+def test_reduce_binary_power():
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(3)]
+    y = DecisionVariable.integer(3, lower=0, upper=2, name="y")
+    objective = Polynomial(terms={(0, 0, 1): 1.0, (0, 1): 2.0, (2,): 1.0})
+    instance = Instance.from_components(
+        decision_variables=x,
+        objective=objective,
+        constraints=[(x[0] * x[1] * x[1] * x[2] + x[1] * x[2] <= 1).set_id(0)],
+        sense=Instance.MINIMIZE,
+    )
+
+    adapter = OMMXFixstarsAmplifyAdapter(instance)
+    assert adapter.model.objective.as_dict() == {(0, 1): 3.0, (2,): 1.0}
+    poly, _, _ = adapter.model.constraints[0].conditional
+    assert poly.as_dict() == {(0, 1, 2): 1.0, (1, 2): 1.0, (): -1.0}
+    assert adapter.stats.reduced_terms == 1
+    assert adapter.stats.reduced_degree == 1
+    assert adapter.stats.max_degree == 3
+    assert instance.objective.terms == objective.terms
+
+    # Powers of integer variables are kept.
+    instance = Instance.from_components(
+        decision_variables=x + [y],
+        objective=x[0] * y * y + x[0] * x[0] * y,
+        constraints=[],
+        sense=Instance.MINIMIZE,
+    )
+    adapter = OMMXFixstarsAmplifyAdapter(instance)
+    assert adapter.model.objective.as_dict() == {(0, 1, 1): 1.0, (0, 1): 1.0}
+    # The degree of the objective stays 3.
+    assert adapter.stats.reduced_terms == 0
+    assert adapter.stats.reduced_degree == 0
@@ -0,0 +1,68 @@
+import subprocess
+import sys
+
+import pytest
+from ommx.v1 import DecisionVariable, Instance
+
+from ommx_fixstars_amplify_adapter.adapter import OMMXFixstarsAmplifyAdapter
+from ommx_fixstars_amplify_adapter.exception import OMMXFixstarsAmplifyAdapterError
+
+
+def test_lazy_model():
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(2)]
+    instance = Instance.from_components(
+        decision_variables=x,
+        objective=x[0] + x[1],
+        constraints=[(x[0] + x[1] <= 1).set_id(0)],
+        sense=Instance.MINIMIZE,
+    )
+
+    adapter = OMMXFixstarsAmplifyAdapter(instance)
+    assert "model" not in vars(adapter)
+
+    # Updating before the model is built only replaces the instance.
+    updated = Instance.from_components(
+        decision_variables=x,
+        objective=x[0] + 2 * x[1],
+        constraints=[],
+        sense=Instance.MINIMIZE,
+    )
+    adapter.update(updated)
+    assert "model" not in vars(adapter)
+
+    model = adapter.solver_input
+    assert adapter.model is model
+    assert len(model.constraints) == 0
+    assert adapter.variable_index == {0: 0, 1: 1}
+
+
+def test_lazy_model_error():
+    x = DecisionVariable.binary(0)
+    # Semi-integer variables are not supported.
+    y = DecisionVariable.of_type(
+        kind=DecisionVariable.SEMI_INTEGER, id=1, lower=0, upper=3
+    )
+    instance = Instance.from_components(
+        decision_variables=[x, y],
+        objective=x + y,
+        constraints=[(x + y <= 2).set_id(0)],
+        sense=Instance.MINIMIZE,
+    )
+
+    adapter = OMMXFixstarsAmplifyAdapter(instance)
+    # A failed build leaves nothing behind, so every access raises.
+    for _ in range(2):
+        with pytest.raises(OMMXFixstarsAmplifyAdapterError):
+            adapter.solver_input
+        assert "model" not in vars(adapter)
+        assert "variable_index" not in vars(adapter)
+
+
+def test_lazy_import():
+    code = (
+        "import sys, ommx_fixstars_amplify_adapter as adapter;"
+        "assert 'amplify' not in sys.modules and 'ommx.v1' not in sys.modules;"
+        "adapter.model_to_instance;"
+        "assert 'amplify' in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -1,10 +1,13 @@
+import io
+
 import amplify
 import pytest
-from ommx.v1 import Constraint, DecisionVariable
+from ommx.v1 import Constraint, DecisionVariable, Instance
 
 from ommx_fixstars_amplify_adapter.amplify_to_ommx import (
     model_to_instance,
     OMMXInstanceBuilder,
+    write_instance,
 )
 from ommx_fixstars_amplify_adapter.exception import OMMXFixstarsAmplifyAdapterError
 
@@ -155,3 +158,101 @@ def test_error_ising_variable():
 
     with pytest.raises(OMMXFixstarsAmplifyAdapterError):
         model_to_instance(model)
+
+
+def test_matrix_to_ommx():
+    gen = amplify.VariableGenerator()
+    matrix = gen.matrix("Binary", (2, 2))
+    matrix.quadratic[0, 0, 0, 1] = 2.0
+    matrix.quadratic[0, 1, 0, 0] = 1.0
+    matrix.quadratic[1, 0, 1, 0] = 5.0
+    matrix.quadratic[1, 1, 0, 1] = -4.0
+    matrix.linear[:] = [[1.0, 3.0], [0.0, 2.0]]
+    matrix.constant = 7.0
+    model = amplify.Model(matrix)
+
+    builder = OMMXInstanceBuilder(model)
+    function = builder._matrix_to_ommx(matrix)
+    assert function.terms == builder._poly_to_ommx(matrix.to_poly()).terms
+    assert function.terms == {
+        (0, 1): 3.0,
+        (1, 3): -4.0,
+        (0,): 1.0,
+        (1,): 3.0,
+        (2,): 5.0,
+        (3,): 2.0,
+        (): 7.0,
+    }
+    assert not builder._is_empty_model()
+    assert model_to_instance(model).objective.terms == function.terms
+
+
+def test_negated_constraints():
+    gen = amplify.VariableGenerator()
+    x = gen.array("Binary", 3)
+    model = amplify.Model()
+    model += amplify.greater_equal(2.0 * x[0] * x[1] + 3.0 * x[2] + 1.0, 2.0)
+    model += amplify.clamp(2.0 * x[0] * x[1] - x[2] * x[0] * x[1], (-1.0, 1.0))
+    ommx_instance = model_to_instance(model)
+
+    assert len(ommx_instance.constraints) == 3
+    # 2 x0 x1 + 3 x2 + 1 >= 2
+    assert ommx_instance.get_constraint_by_id(0).function.terms == {
+        (0, 1): -2.0,
+        (2,): -3.0,
+        (): 1.0,
+    }
+    # -1 <= 2 x0 x1 - x0 x1 x2 <= 1
+    assert ommx_instance.get_constraint_by_id(1).function.terms == {
+        (0, 1): -2.0,
+        (0, 1, 2): 1.0,
+        (): -1.0,
+    }
+    assert ommx_instance.get_constraint_by_id(2).function.terms == {
+        (0, 1): 2.0,
+        (0, 1, 2): -1.0,
+        (): -1.0,
+    }
+
+
+def test_write_instance():
+    gen = amplify.VariableGenerator()
+    x = gen.array("Binary", 5, name="x")
+    y = gen.scalar("Integer", name="y", bounds=(0, 4))
+    model = amplify.Model()
+    model += x[0] * x[1] * y + 2.0 * x[2] - y + 3.0
+    for i in range(4):
+        model += amplify.less_equal(x[i] + x[i + 1], 1.0)
+    model += amplify.clamp(x.sum() + y, (1, 5))
+
+    stream = io.BytesIO()
+    written = write_instance(model, stream, chunk_size=2)
+    assert written == len(stream.getvalue())
+    streamed = Instance.from_bytes(stream.getvalue())
+    expected = model_to_instance(model)
+
+    assert [var.id for var in streamed.decision_variables] == list(range(6))
+    assert [
+        (var.kind, var.bound.lower, var.bound.upper, var.name)
+        for var in streamed.decision_variables
+    ] == [
+        (var.kind, var.bound.lower, var.bound.upper, var.name)
+        for var in expected.decision_variables
+    ]
+    assert streamed.objective.terms == expected.objective.terms
+    assert [
+        (constr.id, constr.equality, constr.name, constr.function.terms)
+        for constr in streamed.constraints
+    ] == [
+        (constr.id, constr.equality, constr.name, constr.function.terms)
+        for constr in expected.constraints
+    ]
+    assert streamed.sense == Instance.MINIMIZE
+
+
+def test_write_empty_instance():
+    stream = io.BytesIO()
+    write_instance(amplify.Model(), stream)
+    instance = Instance.from_bytes(stream.getvalue())
+    assert len(instance.decision_variables) == 0
+    assert len(instance.constraints) == 0
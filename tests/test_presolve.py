@@ -0,0 +1,97 @@
+import amplify
+from ommx.v1 import DecisionVariable, Instance
+
+from ommx_fixstars_amplify_adapter.adapter import OMMXFixstarsAmplifyAdapter
+from ommx_fixstars_amplify_adapter.presolve import presolve
+from conftest import FixedSolutionClient, requires_custom_client
+
+
+def reducible_instance() -> Instance:
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(4)]
+    y = DecisionVariable.integer(4, lower=0, upper=10, name="y")
+    z = DecisionVariable.integer(5, lower=2, upper=2, name="z")
+    w = DecisionVariable.continuous(6, lower=-5, upper=5, name="w")
+    return Instance.from_components(
+        decision_variables=x + [y, z, w],
+        objective=x[0] * x[1] + x[2] + y + z * x[3] + w,
+        constraints=[
+            # Fixes x[0].
+            (x[0] == 1).set_id(0),
+            # Bounds on y and w.
+            (2 * y <= 7).set_id(1),
+            (w >= 1.5).set_id(4),
+            # Redundant for binary variables, then for y <= 3.
+            (x[1] + x[2] <= 2).set_id(2),
+            (x[3] + y <= 5).set_id(5),
+            (x[2] + y + z >= 3).set_id(3),
+        ],
+        sense=Instance.MINIMIZE,
+    )
+
+
+def test_presolve():
+    presolved = presolve(reducible_instance())
+    assert presolved.fixed_values == {0: 1.0, 5: 2.0}
+    assert sorted(presolved.removed_constraint_ids) == [0, 1, 2, 4, 5]
+
+    reduced = presolved.instance
+    assert reduced.objective.terms == {
+        (1,): 1.0,
+        (2,): 1.0,
+        (3,): 2.0,
+        (4,): 1.0,
+        (6,): 1.0,
+    }
+    (constraint,) = reduced.constraints
+    assert constraint.id == 3
+    assert constraint.function.terms == {(2,): -1.0, (4,): -1.0, (): 1.0}
+    bounds = {
+        var.id: (var.bound.lower, var.bound.upper)
+        for var in reduced.used_decision_variables
+    }
+    assert bounds[4] == (0.0, 3.0)
+    assert bounds[6] == (1.5, 5.0)
+
+
+def test_presolve_keeps_infeasible_constraints():
+    x = DecisionVariable.integer(0, lower=0, upper=3)
+    y = DecisionVariable.binary(1)
+    instance = Instance.from_components(
+        decision_variables=[x, y],
+        objective=x + y,
+        constraints=[(x >= 4).set_id(0), (2 * y == 1).set_id(1)],
+        sense=Instance.MINIMIZE,
+    )
+    presolved = presolve(instance)
+    assert presolved.removed_constraint_ids == []
+    assert [c.id for c in presolved.instance.constraints] == [0, 1]
+
+
+@requires_custom_client
+def test_decode_presolved():
+    instance = reducible_instance()
+    adapter = OMMXFixstarsAmplifyAdapter(instance, presolve=True)
+    model = adapter.solver_input
+    assert len(model.variables) == 5
+    assert len(model.constraints) == 1
+    assert set(adapter.variable_index) == {1, 2, 3, 4, 6}
+    assert "presolve" in adapter.stats.timings
+
+    # x1, x2, x3, y, w
+    client = FixedSolutionClient([[0.0, 1.0, 0.0, 0.0, 1.5]])
+    result = amplify.solve(model, client)
+    solution = adapter.decode(result)
+    assert solution.feasible
+    assert solution.state.entries == {
+        0: 1.0,
+        1: 0.0,
+        2: 1.0,
+        3: 0.0,
+        4: 0.0,
+        5: 2.0,
+        6: 1.5,
+    }
+    assert solution.objective == 2.5
+
+    sample_set = adapter.decode_to_sampleset(result)
+    assert sample_set.get(0).state.entries == solution.state.entries
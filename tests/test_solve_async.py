@@ -0,0 +1,86 @@
+import asyncio
+import threading
+
+import pytest
+from ommx.v1 import DecisionVariable, Instance
+
+from ommx_fixstars_amplify_adapter.adapter import OMMXFixstarsAmplifyAdapter
+from conftest import FixedSolutionClient, requires_custom_client
+
+
+class CountingClient(FixedSolutionClient):
+    """
+    Records the largest number of solves running at the same time.
+    """
+
+    def __init__(self, solutions, release: threading.Event):
+        super().__init__(solutions)
+        self.release = release
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def solve(self, objective, constraints, dry_run=False):
+        if dry_run:
+            return None
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        self.release.wait(timeout=10)
+        with self.lock:
+            self.running -= 1
+        return super().solve(objective, constraints)
+
+
+def knapsack_instance() -> Instance:
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(3)]
+    return Instance.from_components(
+        decision_variables=x,
+        objective=x[0] + 2 * x[1] + 3 * x[2],
+        constraints=[(x[0] + x[1] + x[2] <= 2).set_id(0)],
+        sense=Instance.MAXIMIZE,
+    )
+
+
+@requires_custom_client
+def test_solve_async():
+    release = threading.Event()
+    client = CountingClient([[0.0, 1.0, 1.0]], release)
+
+    async def main():
+        semaphore = asyncio.Semaphore(2)
+        tasks = [
+            asyncio.create_task(
+                OMMXFixstarsAmplifyAdapter.solve_async(
+                    knapsack_instance(), client=client, semaphore=semaphore
+                )
+            )
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0.1)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    solutions = asyncio.run(main())
+    assert [solution.objective for solution in solutions] == [5.0] * 5
+    assert client.max_running == 2
+
+
+@requires_custom_client
+def test_solve_async_cancel():
+    release = threading.Event()
+    client = CountingClient([[0.0, 1.0, 1.0]], release)
+
+    async def main():
+        task = asyncio.create_task(
+            OMMXFixstarsAmplifyAdapter.solve_async(knapsack_instance(), client=client)
+        )
+        await asyncio.sleep(0.1)
+        task.cancel()
+        try:
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        finally:
+            release.set()
+
+    asyncio.run(main())
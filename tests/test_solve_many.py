@@ -0,0 +1,39 @@
+import pytest
+from ommx.v1 import DecisionVariable, Instance
+
+from ommx_fixstars_amplify_adapter.adapter import OMMXFixstarsAmplifyAdapter
+from ommx_fixstars_amplify_adapter.exception import OMMXFixstarsAmplifyAdapterError
+from conftest import FixedSolutionClient, requires_custom_client
+
+
+def weighted_instance(weight: float) -> Instance:
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(2)]
+    return Instance.from_components(
+        decision_variables=x,
+        objective=weight * x[0] + x[1],
+        constraints=[(x[0] + x[1] <= 1).set_id(0)],
+        sense=Instance.MAXIMIZE,
+    )
+
+
+@requires_custom_client
+@pytest.mark.parametrize("ordered", [True, False])
+def test_solve_many(ordered):
+    clients = [FixedSolutionClient([[1.0, 0.0]]) for _ in range(2)]
+    instances = (weighted_instance(weight) for weight in range(10))
+
+    results = list(
+        OMMXFixstarsAmplifyAdapter.solve_many(
+            instances, clients=clients, max_workers=3, ordered=ordered
+        )
+    )
+    if ordered:
+        assert [index for index, _ in results] == list(range(10))
+    assert sorted((index, solution.objective) for index, solution in results) == [
+        (weight, float(weight)) for weight in range(10)
+    ]
+
+
+def test_error_solve_many_without_token():
+    with pytest.raises(OMMXFixstarsAmplifyAdapterError):
+        next(OMMXFixstarsAmplifyAdapter.solve_many([weighted_instance(1.0)]))
@@ -0,0 +1,87 @@
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import amplify
+from ommx.v1 import DecisionVariable, Instance
+
+from ommx_fixstars_amplify_adapter import ModelCache
+from ommx_fixstars_amplify_adapter.adapter import OMMXFixstarsAmplifyAdapter
+from ommx_fixstars_amplify_adapter.amplify_to_ommx import OMMXInstanceBuilder
+from conftest import FixedSolutionClient, requires_custom_client
+
+
+def mixed_instance() -> Instance:
+    x = [DecisionVariable.binary(i, name="x", subscripts=[i]) for i in range(3)]
+    y = DecisionVariable.integer(3, lower=0, upper=5, name="y")
+    return Instance.from_components(
+        decision_variables=x + [y],
+        objective=x[0] + 2 * x[1] * y + 1,
+        constraints=[
+            (x[0] + x[1] + x[2] <= 2).set_id(0),
+            (x[0] * x[1] * x[2] == 0).set_id(1),
+        ],
+        sense=Instance.MINIMIZE,
+    )
+
+
+def test_adapter_stats():
+    completed = []
+    adapter = OMMXFixstarsAmplifyAdapter(
+        mixed_instance(), stats_sink=lambda stage, stats: completed.append(stage)
+    )
+    assert completed == []
+    adapter.solver_input
+    stats = adapter.stats
+    assert completed == ["decision_variables", "objective", "constraints"]
+    assert list(stats.timings) == completed
+    assert all(seconds >= 0.0 for seconds in stats.timings.values())
+    assert (stats.num_variables, stats.num_constraints) == (4, 2)
+    assert (stats.num_terms, stats.max_degree) == (3 + 4 + 1, 3)
+    assert stats.peak_memory is None
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        chunked = OMMXFixstarsAmplifyAdapter(mixed_instance(), executor=executor)
+        chunked.solver_input
+    assert (chunked.stats.num_terms, chunked.stats.max_degree) == (8, 3)
+
+
+def test_adapter_stats_cache():
+    cache = ModelCache()
+    OMMXFixstarsAmplifyAdapter(mixed_instance(), model_cache=cache).solver_input
+    adapter = OMMXFixstarsAmplifyAdapter(mixed_instance(), model_cache=cache)
+    adapter.solver_input
+    assert list(adapter.stats.timings) == ["model_cache"]
+    assert (adapter.stats.num_terms, adapter.stats.num_constraints) == (8, 2)
+
+
+@requires_custom_client
+def test_solve_stats():
+    adapter = OMMXFixstarsAmplifyAdapter(mixed_instance())
+    result = adapter._solve_model(FixedSolutionClient([[1.0, 0.0, 0.0, 0.0]]))
+    adapter.decode(result)
+    assert list(adapter.stats.timings)[3:] == ["solve", "decode", "evaluate"]
+
+
+def test_builder_stats():
+    gen = amplify.VariableGenerator()
+    x = gen.array("Binary", 3)
+    model = amplify.Model(x[0] * x[1] + 2 * x[2] + 1)
+    model += amplify.clamp(x[0] + x[1], (1, 2))
+
+    builder = OMMXInstanceBuilder(model)
+    tracemalloc.start()
+    try:
+        builder.build()
+    finally:
+        tracemalloc.stop()
+    stats = builder.stats
+    assert list(stats.timings) == [
+        "decision_variables",
+        "objective",
+        "constraints",
+        "instance",
+    ]
+    assert (stats.num_variables, stats.num_constraints) == (3, 2)
+    # x0 x1 + 2 x2 + 1, -x0 - x1 + 1 and x0 + x1 - 2
+    assert (stats.num_terms, stats.max_degree) == (3 + 3 + 3, 2)
+    assert stats.peak_memory is not None and stats.peak_memory > 0